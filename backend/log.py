@@ -0,0 +1,146 @@
+# backend/log.py
+import logging
+import random
+import re
+import uuid
+from contextlib import ExitStack
+from contextvars import ContextVar
+from datetime import datetime, timezone
+import orjson
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connections
+
+# Per-request logging context; unset outside requests (management commands, workers)
+request_id_var = ContextVar('request_id', default=None)
+route_var = ContextVar('route', default=None)
+sampled_var = ContextVar('log_sampled', default=True)
+
+# Client-supplied ids end up in SQL comments, so only accept a conservative charset
+re_request_id = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+SENSITIVE_KEYS = frozenset({
+    'password', 'password2', 'token', 'access', 'refresh', 'secret',
+    'api_key', 'x-api-key', 'authorization', 'cookie', 'signature',
+})
+REDACTED = '[REDACTED]'
+
+# Attributes every LogRecord has; anything else was passed via extra=
+RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def redact(value):
+    """Copy of value with the values of sensitive keys masked, recursing into dicts and lists"""
+    if isinstance(value, dict):
+        return {
+            k: REDACTED if isinstance(k, str) and k.lower() in SENSITIVE_KEYS else redact(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return type(value)(redact(v) for v in value)
+    return value
+
+
+class RequestIDMiddleware:
+    """
+    Give every request an id (the caller's X-Request-ID if well formed), echo
+    it on the response, attach it to log records and tag each SQL statement
+    run on the request's behalf with it. Also decides once per request whether
+    its INFO/DEBUG logs are kept, using LOG_SAMPLE_RATES for the matched route.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.META.get('HTTP_X_REQUEST_ID', '')
+        if not re_request_id.match(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+
+        # Cleared on request_finished rather than here, so Django's own
+        # response logging (which runs after the middleware) is still tagged
+        request_id_var.set(request_id)
+        route_var.set(None)
+        sampled_var.set(True)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(tag_query))
+            response = self.get_response(request)
+
+        response.headers['X-Request-ID'] = request_id
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        route = request.resolver_match.route
+        route_var.set(route)
+        rate = settings.LOG_SAMPLE_RATES.get(route, settings.LOG_SAMPLE_RATE)
+        sampled_var.set(rate >= 1 or random.random() < rate)
+
+
+def clear_request_context(**kwargs):
+    """Reset the logging context once a response has been sent"""
+    request_id_var.set(None)
+    route_var.set(None)
+    sampled_var.set(True)
+
+
+request_finished.connect(clear_request_context, dispatch_uid='backend.log.clear_request_context')
+
+
+def tag_query(execute, sql, params, many, context):
+    """Append the request id as a SQL comment so slow-query logs and pg_stat_activity can be traced back"""
+    request_id = request_id_var.get()
+    if request_id:
+        sql = f"{sql} /* request_id={request_id} */"
+    return execute(sql, params, many, context)
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach request_id and route to every record"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        record.route = route_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Drop INFO/DEBUG records of requests that weren't sampled; warnings and errors always pass"""
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or sampled_var.get()
+
+
+class RedactingFilter(logging.Filter):
+    """Mask sensitive keys in dict arguments and extra= fields before anything formats them"""
+
+    def filter(self, record):
+        if record.args:
+            record.args = redact(record.args)
+        for key, value in record.__dict__.items():
+            if key in RESERVED_ATTRS:
+                continue
+            if key.lower() in SENSITIVE_KEYS:
+                record.__dict__[key] = REDACTED
+            elif isinstance(value, (dict, list, tuple)):
+                record.__dict__[key] = redact(value)
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line; the message is only interpolated here, after filtering"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in RESERVED_ATTRS and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
@@ -0,0 +1,48 @@
+# backend/middleware.py
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip still works without it
+    brotli = None
+
+re_accepts_brotli = _lazy_re_compile(r"\bbr\b")
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress responses larger than RESPONSE_COMPRESSION_MIN_LENGTH.
+    JSON responses use brotli when the client accepts it and the package is
+    installed; everything else falls back to Django's gzip handling, which
+    pads its output against BREACH. Brotli is limited to JSON so pages that
+    embed a CSRF token never go through it.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming:
+            return super().process_response(request, response)
+
+        if len(response.content) < settings.RESPONSE_COMPRESSION_MIN_LENGTH:
+            return response
+
+        accepts_brotli = re_accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        is_json = response.get('Content-Type', '').startswith('application/json')
+        if brotli is None or not accepts_brotli or not is_json or response.has_header('Content-Encoding'):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed_content = brotli.compress(response.content, quality=settings.RESPONSE_BROTLI_QUALITY)
+        if len(compressed_content) >= len(response.content):
+            return response
+
+        response.content = compressed_content
+        response.headers['Content-Length'] = str(len(response.content))
+        # A strong ETag no longer matches the encoded bytes, so weaken it
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
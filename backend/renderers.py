@@ -0,0 +1,35 @@
+# backend/renderers.py
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# orjson handles the common types itself; anything else (Decimal, lazy strings,
+# datetimes, querysets, ...) is encoded exactly the way DRF's encoder would
+_drf_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement for DRF's JSONRenderer backed by orjson.
+    Produces the same compact JSON as DRF's defaults at a fraction of the CPU cost.
+    Indented output (`; indent=` or the browsable API) and non-default
+    UNICODE_JSON/COMPACT_JSON settings go through DRF's renderer instead.
+    Unlike DRF's strict mode, NaN and infinite floats render as null rather than raising.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Datetimes are passed through so they get DRF's "Z" suffix formatting;
+        # non-string keys are stringified like the stdlib encoder does
+        ret = orjson.dumps(
+            data,
+            default=_drf_encoder.default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+        )
+        # Like DRF, escape the line separators JSON allows but JavaScript string literals don't
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
@@ -30,8 +30,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so everything below (including the DB) logs under the request's id
+    'backend.log.RequestIDMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    # After WhiteNoise (static files are pre-compressed) and before anything else touching the body
+    'backend.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,14 +81,110 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "backend.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    # Budgets for backend.throttling; "moralis" counts upstream wallet fetches, not requests
+    "DEFAULT_THROTTLE_RATES": {
+        "moralis": env('THROTTLE_RATE_MORALIS', default='200/hour'),
+        "register": env('THROTTLE_RATE_REGISTER', default='10/hour'),
+    },
+    # Proxies in front of the app, so client IPs are read from the right X-Forwarded-For entry
+    "NUM_PROXIES": env.int('NUM_PROXIES', default=None),
 }
 
+# Cache (throttle counters live here, so it must be shared across workers in production, e.g. redis://)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# Response compression
+# Smaller bodies aren't worth the CPU or the extra headers
+RESPONSE_COMPRESSION_MIN_LENGTH = 1024
+# Fast brotli setting suited to dynamic responses
+RESPONSE_BROTLI_QUALITY = 4
+
 # JWT settings
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
 }
 
+# Moralis HTTP calls: (connect, read) seconds. The read timeout applies to each socket read,
+# not the whole response, so on its own it doesn't bound how long a call takes
+MORALIS_REQUEST_TIMEOUT = (3.05, 10)
+# Total time one wallet refresh (net worth plus up to MAX_TOKEN_PAGES token pages) may spend
+# on Moralis. No call starts after it runs out, and each call's timeouts are cut to what's left,
+# so a refresh overruns it by at most one slowly trickling response
+WALLET_REFRESH_TIME_LIMIT = timedelta(seconds=10)
+
+# Wallet sync jobs
+# Wallets synced more recently than this are not fetched again
+WALLET_STALE_AFTER = timedelta(minutes=5)
+# Time a /sync/ request spends starting wallet refreshes. The last one may run another
+# WALLET_REFRESH_TIME_LIMIT, so budget + limit (25s) stays under gunicorn's 30s timeout
+WALLET_SYNC_REQUEST_BUDGET = timedelta(seconds=15)
+# Claimed wallets not finished within this window are retried by the next processor
+WALLET_SYNC_CLAIM_TIMEOUT = timedelta(minutes=5)
+# Completed jobs (and their per-wallet items) are deleted this long after finishing
+WALLET_SYNC_JOB_RETENTION = timedelta(days=1)
+# Background sync workers renew partition leases within this window; a silent worker's partitions move on after it.
+# Workers stop starting refreshes at half of it, so lease / 2 + WALLET_REFRESH_TIME_LIMIT (40s) fits inside
+WALLET_SYNC_LEASE_TIMEOUT = timedelta(seconds=60)
+
+# Moralis Streams webhooks
+# Secret used to sign stream payloads; webhooks are rejected while it's unset
+MORALIS_STREAMS_SECRET = env('MORALIS_STREAMS_SECRET', default='')
+# Wait for a wallet's events to go quiet this long before refreshing it...
+WALLET_EVENT_DEBOUNCE = timedelta(seconds=30)
+# ...but never hold a busy wallet back longer than this
+WALLET_EVENT_MAX_DELAY = timedelta(minutes=5)
+# Wallets whose refresh failed are retried after this, doubling per attempt up to the cap
+WALLET_EVENT_RETRY_BACKOFF = timedelta(seconds=30)
+WALLET_EVENT_MAX_BACKOFF = timedelta(hours=1)
+
+# Logging
+# Share of requests whose INFO/DEBUG logs are kept; warnings and errors are always kept
+LOG_SAMPLE_RATE = env.float('LOG_SAMPLE_RATE', default=1.0)
+# Per-route overrides, keyed by URL pattern
+LOG_SAMPLE_RATES = {
+    # Clients poll job progress every few seconds
+    'api/wallets/sync/<int:job_id>/': 0.05,
+    'api/wallets/webhooks/moralis/': 0.1,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_context': {'()': 'backend.log.RequestContextFilter'},
+        'sampling': {'()': 'backend.log.SamplingFilter'},
+        'redacting': {'()': 'backend.log.RedactingFilter'},
+    },
+    'formatters': {
+        'json': {'()': 'backend.log.JSONFormatter'},
+        'text': {'format': '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            # Sampling first so dropped records skip the rest of the work
+            'filters': ['sampling', 'request_context', 'redacting'],
+            'formatter': env('LOG_FORMAT', default='json'),
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': env('LOG_LEVEL', default='INFO'),
+    },
+    'loggers': {
+        # Django logs its own request errors through the root handler
+        'django': {'level': 'INFO'},
+        'django.db.backends': {'level': 'WARNING'},
+    },
+}
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
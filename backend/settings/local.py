@@ -1,7 +1,5 @@
 from .base import *
 
-print("LOADING LOCAL SETTINGS")
-
 # Debug mode enabled for local development
 DEBUG = True
 
@@ -19,6 +17,16 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Several sync workers can run side by side: take the write lock up
+        # front and wait for it rather than failing with "database is locked"
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # On disk (not in memory) so concurrent worker tests see one database
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
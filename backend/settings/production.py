@@ -1,8 +1,6 @@
 from .base import *
 import dj_database_url
 
-print("LOADING PRODUCTION SETTINGS")
-
 # No debug in production
 DEBUG = False
 
@@ -1,8 +1,6 @@
 from .base import *
 import dj_database_url
 
-print("LOADING STAGING SETTINGS")
-
 # Debug could be enabled in staging for troubleshooting
 DEBUG = True
 
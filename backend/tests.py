@@ -0,0 +1,259 @@
+import gzip
+import logging
+import math
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock, skipIf
+import orjson
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from wallets.models import SyncJob, Wallet, WalletUser
+from wallets.services import MoralisService
+from wallets.views import SyncJobView
+from .log import REDACTED, JSONFormatter, RedactingFilter, RequestContextFilter, SamplingFilter
+from .middleware import CompressionMiddleware, brotli
+from .renderers import ORJSONRenderer
+
+
+class CapturingHandler(logging.Handler):
+    """Collects records that make it through the same filters as the console handler"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        for log_filter in (SamplingFilter(), RequestContextFilter(), RedactingFilter()):
+            self.addFilter(log_filter)
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class LoggingTestCase(TestCase):
+    def setUp(self):
+        self.handler = CapturingHandler()
+        root = logging.getLogger()
+        root.addHandler(self.handler)
+        self.addCleanup(root.removeHandler, self.handler)
+
+
+class RedactionTests(LoggingTestCase):
+    def test_sensitive_values_are_masked_in_args_and_extra(self):
+        logging.getLogger('backend.tests').info(
+            "Login attempt %s", {'username': 'alice', 'password': 'hunter2'},
+            extra={'authorization': 'Bearer abc.def', 'headers': {'Authorization': 'Bearer abc.def', 'Accept': '*/*'}},
+        )
+
+        record, = self.handler.records
+        line = JSONFormatter().format(record)
+        self.assertNotIn('hunter2', line)
+        self.assertNotIn('abc.def', line)
+
+        entry = orjson.loads(line)
+        self.assertIn('alice', entry['msg'])
+        self.assertEqual(entry['authorization'], REDACTED)
+        self.assertEqual(entry['headers'], {'Authorization': REDACTED, 'Accept': '*/*'})
+
+
+class RequestIDTests(LoggingTestCase):
+    url = '/api/wallets/supported_chains/'
+
+    def test_valid_request_id_is_echoed(self):
+        response = self.client.get(self.url, HTTP_X_REQUEST_ID='client-abc.123')
+        self.assertEqual(response['X-Request-ID'], 'client-abc.123')
+
+    def test_malformed_request_id_is_replaced(self):
+        for bad in ('evil */ DROP TABLE x; /*', 'x' * 65, ''):
+            response = self.client.get(self.url, HTTP_X_REQUEST_ID=bad)
+            self.assertRegex(response['X-Request-ID'], r'^[0-9a-f]{32}$')
+
+    def test_request_id_is_attached_to_logs(self):
+        self.client.get('/api/wallets/sync/1/', HTTP_X_REQUEST_ID='trace-me')
+
+        record, = [r for r in self.handler.records if r.name == 'django.request']
+        self.assertEqual(record.request_id, 'trace-me')
+        self.assertEqual(record.route, 'api/wallets/sync/<int:job_id>/')
+
+
+@override_settings(LOG_SAMPLE_RATES={'api/wallets/sync/<int:job_id>/': 0})
+class SamplingTests(LoggingTestCase):
+    def setUp(self):
+        super().setUp()
+        user = get_user_model().objects.create_user(email='poller@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def get_job_logging_info(self):
+        """Poll a missing job (a 404 warning) through a view that also logs at INFO"""
+        get = SyncJobView.get
+
+        def logging_get(view, request, job_id):
+            logging.getLogger('wallets.views').info("Polling sync job %s", job_id)
+            return get(view, request, job_id)
+
+        with mock.patch.object(SyncJobView, 'get', logging_get):
+            return self.client.get('/api/wallets/sync/999/')
+
+    def test_warnings_pass_on_unsampled_route(self):
+        response = self.get_job_logging_info()
+
+        self.assertEqual(response.status_code, 404)
+        levels = [r.levelno for r in self.handler.records]
+        self.assertNotIn(logging.INFO, levels)
+        self.assertIn(logging.WARNING, levels)
+
+    @override_settings(LOG_SAMPLE_RATES={})
+    def test_info_passes_on_sampled_route(self):
+        self.get_job_logging_info()
+
+        messages = [r.getMessage() for r in self.handler.records]
+        self.assertIn("Polling sync job 999", messages)
+
+
+class CostRateThrottleTests(TestCase):
+    """Runs against the default budgets: 200 Moralis fetches and 10 registrations per hour"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(email='throttled@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        # Nothing here should reach Moralis; a sync only has to start its job
+        self.enterContext(mock.patch('wallets.views.run_sync_job'))
+        self.enterContext(mock.patch.object(MoralisService, 'get_wallet_net_worth', return_value=(False, 'offline')))
+
+    def add_stale_wallets(self, count):
+        start = Wallet.objects.count()
+        wallets = Wallet.objects.bulk_create(
+            Wallet(address=f'0x{i:040x}', chain='eth') for i in range(start, start + count)
+        )
+        WalletUser.objects.bulk_create(WalletUser(user=self.user, wallet=wallet) for wallet in wallets)
+
+    def finish_jobs(self):
+        SyncJob.objects.filter(user=self.user).update(status=SyncJob.Status.COMPLETED)
+
+    def add_wallet(self):
+        return self.client.post('/api/wallets/add/', {'address': '0x' + 'f' * 40, 'chain': 'eth'}, format='json')
+
+    def test_sync_is_charged_per_stale_wallet_up_to_the_budget(self):
+        self.add_stale_wallets(300)
+
+        # 300 stale wallets cost min(300, 200): the whole budget, but the sync still runs
+        self.assertEqual(self.client.get('/api/wallets/sync/').status_code, 202)
+
+        response = self.add_wallet()
+        self.assertEqual(response.status_code, 429)
+        retry_after = int(response['Retry-After'])
+        self.assertGreater(retry_after, 0)
+        self.assertLessEqual(retry_after, 3600)
+
+    def test_rejected_request_is_refunded(self):
+        self.add_stale_wallets(150)
+        self.assertEqual(self.client.get('/api/wallets/sync/').status_code, 202)
+        self.finish_jobs()
+
+        # Another 150 doesn't fit in the 50 left...
+        self.assertEqual(self.client.get('/api/wallets/sync/').status_code, 429)
+        # ...and isn't kept, so a single fetch still does
+        self.assertEqual(self.add_wallet().status_code, 400)
+
+    def test_requests_without_upstream_calls_are_never_charged(self):
+        self.add_stale_wallets(300)
+        self.client.get('/api/wallets/sync/')
+        self.assertEqual(self.add_wallet().status_code, 429)
+
+        for _ in range(5):
+            self.assertEqual(self.client.get('/api/wallets/add/').status_code, 200)
+            response = self.client.post('/api/wallets/remove/', {'address': '0x' + 'e' * 40, 'chain': 'eth'})
+            self.assertEqual(response.status_code, 404)
+        # Attaching to the running job costs nothing either
+        self.assertEqual(self.client.get('/api/wallets/sync/').status_code, 202)
+
+    def test_registration_is_budgeted_per_ip(self):
+        client = APIClient()
+
+        def register(n, ip):
+            return client.post(
+                '/api/users/register/',
+                {'email': f'new{n}@example.com', 'password': 'x', 'password2': 'x'},
+                format='json', REMOTE_ADDR=ip,
+            )
+
+        for n in range(10):
+            self.assertEqual(register(n, '10.0.0.1').status_code, 201)
+        response = register(10, '10.0.0.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+        self.assertEqual(register(11, '10.0.0.2').status_code, 201)
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    data = {
+        'address': '0xabc',
+        'balance_usd': Decimal('12.50'),
+        'synced_at': datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+        'symbol': 'ÉTH \u2028 line \u2029 paragraph',
+        'chains': {1: ['eth', None, True, 1.5]},
+    }
+
+    def assert_same_as_drf(self, accepted_media_type=None, renderer_context=None):
+        self.assertEqual(
+            ORJSONRenderer().render(self.data, accepted_media_type, renderer_context),
+            JSONRenderer().render(self.data, accepted_media_type, renderer_context),
+        )
+
+    def test_compact_output_matches_drf(self):
+        self.assert_same_as_drf()
+        self.assert_same_as_drf('application/json')
+        self.assertIn(b'\\u2028', ORJSONRenderer().render(self.data))
+
+    def test_indented_output_matches_drf(self):
+        self.assert_same_as_drf('application/json; indent=4')
+        self.assert_same_as_drf('application/json', {'indent': 2})
+
+    def test_nan_renders_as_null(self):
+        self.assertEqual(ORJSONRenderer().render({'v': math.nan, 'w': math.inf}), b'{"v":null,"w":null}')
+
+
+@override_settings(RESPONSE_COMPRESSION_MIN_LENGTH=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    body = orjson.dumps([{'address': f'0x{i:040x}', 'chain': 'eth'} for i in range(100)])
+
+    def respond(self, accept_encoding, body=None, content_type='application/json'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        response = HttpResponse(self.body if body is None else body, content_type=content_type)
+        response.headers['ETag'] = '"abc"'
+        return CompressionMiddleware(lambda request: response)(request)
+
+    @skipIf(brotli is None, "brotli is not installed")
+    def test_json_uses_brotli_when_accepted(self):
+        response = self.respond('gzip, deflate, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.body)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_gzip_without_brotli(self):
+        response = self.respond('gzip, deflate')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_non_json_never_uses_brotli(self):
+        response = self.respond('br, gzip', body=b'<p>hello</p>' * 200, content_type='text/html')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_small_responses_are_left_alone(self):
+        response = self.respond('gzip, br', body=b'{"ok":true}')
+
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, b'{"ok":true}')
+        self.assertEqual(response['ETag'], '"abc"')
@@ -0,0 +1,78 @@
+# backend/throttling.py
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class CostRateThrottle(SimpleRateThrottle):
+    """
+    Fixed-window throttle where each request spends a cost from the scope's
+    budget instead of counting as one request.
+
+    The rate ("200/hour") is the budget per window. Views report what a
+    request costs through get_throttle_cost(request); zero-cost requests
+    never touch the cache. Each charged request is a single atomic incr in
+    the shared cache, unlike SimpleRateThrottle's read-modify-write of a
+    timestamp list.
+    """
+    cache_format = 'throttle_%(scope)s_%(ident)s_%(window)s'
+
+    def get_cost(self, request, view):
+        get_throttle_cost = getattr(view, 'get_throttle_cost', None)
+        cost = get_throttle_cost(request) if get_throttle_cost else 1
+        # A request larger than the whole budget can still run, once per window
+        return min(cost, self.num_requests)
+
+    def get_ident_for(self, request):
+        """Identify the caller: the user when authenticated, else the client IP"""
+        if request.user and request.user.is_authenticated:
+            return f"user_{request.user.pk}"
+        return f"ip_{self.get_ident(request)}"
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        cost = self.get_cost(request, view)
+        if cost <= 0:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.window_end = (window + 1) * self.duration
+        key = self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident_for(request),
+            'window': window,
+        }
+
+        try:
+            used = self.cache.incr(key, cost)
+        except ValueError:
+            # First charge in this window; if another request beat us to the add, incr its counter
+            if self.cache.add(key, cost, self.duration):
+                used = cost
+            else:
+                used = self.cache.incr(key, cost)
+
+        if used > self.num_requests:
+            # Refund so a cheaper request can still fit in what's left
+            self.cache.decr(key, cost)
+            return False
+        return True
+
+    def wait(self):
+        # Sent back to the client as Retry-After
+        return max(self.window_end - self.now, 0)
+
+
+class MoralisBudgetThrottle(CostRateThrottle):
+    """Per-user budget of upstream Moralis wallet fetches"""
+    scope = 'moralis'
+
+
+class RegistrationThrottle(CostRateThrottle):
+    """Per-IP budget for account registration"""
+    scope = 'register'
+
+    def get_ident_for(self, request):
+        # Registration is anonymous, so always key on the client IP
+        return f"ip_{self.get_ident(request)}"
@@ -0,0 +1,26 @@
+# gunicorn.conf.py - picked up automatically when gunicorn starts from the project root
+import os
+
+# Load the Django app once in the master before forking, so workers share the
+# imported modules copy-on-write instead of each paying for the imports again
+preload_app = True
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '2'))
+# WALLET_SYNC_REQUEST_BUDGET + WALLET_REFRESH_TIME_LIMIT is sized to finish inside this
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+
+
+def when_ready(server):
+    """Warm lazily loaded state in the master so forked workers inherit it"""
+    from django.urls import get_resolver
+
+    # Resolving the URLconf imports every view, serializer and service module
+    get_resolver().url_patterns
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master; each worker opens its own"""
+    from django.db import connections
+
+    connections.close_all()
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+# Case-insensitive exact email lookups (admin "=user__email" search) compile to
+# UPPER("email"::text) = UPPER(...) on Postgres, which the plain unique index can't serve.
+CREATE_INDEX = (
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS customuser_email_upper_idx '
+    'ON users_customuser (UPPER("email"::text))'
+)
+DROP_INDEX = 'DROP INDEX CONCURRENTLY IF EXISTS customuser_email_upper_idx'
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_INDEX)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    # CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,17 +1,23 @@
+import logging
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from backend.throttling import RegistrationThrottle
 from .serializers import UserRegistrationSerializer, UserSerializer
 
+logger = logging.getLogger(__name__)
+
 class RegisterView(APIView):
     """Handle user registration"""
     permission_classes = [AllowAny]
+    throttle_classes = [RegistrationThrottle]
+    
     def post(self, request):
-        print(f"Registration request data: {request.data}")  # Log the incoming data
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
+            logger.info("Registered user %s", user.id, extra={'user_id': user.id})
             
             # Return user information after successful registration
             return Response({
@@ -19,7 +25,8 @@ class RegisterView(APIView):
                 'email': user.email
             }, status=status.HTTP_201_CREATED)
             
-        print(f"Registration validation errors: {serializer.errors}")
+        # Field names only: the rejected values may include the password
+        logger.info("Registration rejected: invalid %s", ', '.join(sorted(serializer.errors)))
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -1,21 +1,78 @@
 # wallet/admin.py
 from django.contrib import admin
-from .models import Wallet, WalletUser
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from .models import Wallet, WalletUser, WalletHolding, PortfolioSummary, SyncPartition
+from .services import MoralisService
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that uses the Postgres planner's row estimate for unfiltered
+    changelists instead of running COUNT(*) over the whole table
+    """
+    # Below this many rows an exact count is cheap enough
+    ESTIMATE_THRESHOLD = 100_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            # reltuples is -1 until the table has been analyzed
+            if row and row[0] > self.ESTIMATE_THRESHOLD:
+                return row[0]
+        return super().count
+
+
+class ChainListFilter(admin.SimpleListFilter):
+    """Filter by chain using the supported chain list instead of SELECT DISTINCT over the table"""
+    title = 'chain'
+    parameter_name = 'chain'
+    field_path = 'chain'
+
+    def lookups(self, request, model_admin):
+        return [(chain_id, chain_name) for chain_name, chain_id in MoralisService.CHAIN_MAPPING.items()]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.field_path: self.value()})
+        return queryset
+
+
+class WalletChainListFilter(ChainListFilter):
+    field_path = 'wallet__chain'
+
 
 @admin.register(Wallet)
 class WalletAdmin(admin.ModelAdmin):
     """Admin configuration for Wallet model"""
     list_display = ('address', 'chain', 'balance_usd', 'synced_at')
-    search_fields = ('address', 'chain')
-    list_filter = ('chain', 'synced_at')
+    # Prefix/exact matches only, served by the UPPER(address) index; chain has its own filter
+    search_fields = ('^address',)
+    list_filter = (ChainListFilter, 'synced_at')
     readonly_fields = ('synced_at',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 @admin.register(WalletUser)
 class WalletUserAdmin(admin.ModelAdmin):
     """Admin configuration for WalletUser model"""
     list_display = ('user', 'wallet_address', 'wallet_chain')
-    search_fields = ('user__username', 'wallet__address')
-    list_filter = ('wallet__chain',)
+    list_select_related = ('user', 'wallet')
+    # Usernames are emails here, so search on the indexed email column instead
+    search_fields = ('=user__email', '^wallet__address')
+    list_filter = (WalletChainListFilter,)
+    raw_id_fields = ('user', 'wallet')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     # Using differently named properties without short_description attributes
     @admin.display(description='Wallet Address')
@@ -25,3 +82,30 @@ class WalletUserAdmin(admin.ModelAdmin):
     @admin.display(description='Chain')
     def wallet_chain(self, obj):
         return obj.wallet.chain
+
+@admin.register(WalletHolding)
+class WalletHoldingAdmin(admin.ModelAdmin):
+    """Admin configuration for WalletHolding model"""
+    list_display = ('wallet', 'symbol', 'token_address', 'amount', 'usd_value', 'price_ts')
+    list_select_related = ('wallet',)
+    # Prefix match on the contract address and exact symbol, both served by UPPER() indexes
+    search_fields = ('^token_address', '=symbol')
+    raw_id_fields = ('wallet',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(PortfolioSummary)
+class PortfolioSummaryAdmin(admin.ModelAdmin):
+    """Admin configuration for PortfolioSummary model (read-mostly; rebuilt from wallets)"""
+    list_display = ('user', 'total_usd', 'wallet_count', 'last_synced_at', 'updated_at')
+    list_select_related = ('user',)
+    search_fields = ('=user__email',)
+    raw_id_fields = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(SyncPartition)
+class SyncPartitionAdmin(admin.ModelAdmin):
+    """Admin configuration for SyncPartition model (which worker holds which slice of wallets)"""
+    list_display = ('number', 'owner', 'lease_expires_at')
+    list_filter = ('owner',)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class WalletsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'wallets'
+
+    def ready(self):
+        # Keep PortfolioSummary in step with WalletUser links however they change
+        from . import signals  # noqa: F401
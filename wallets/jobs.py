@@ -0,0 +1,173 @@
+# wallets/jobs.py
+import logging
+import time
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from .models import SyncJob, SyncJobItem, Wallet
+from .scheduling import prioritize_wallets, stale_wallets
+from .services import refresh_wallet, refresh_portfolio_summaries
+
+logger = logging.getLogger(__name__)
+
+
+def start_sync_job(user):
+    """
+    Return the user's running sync job, creating one if there isn't any.
+    When every wallet is fresh and the latest completed job still covers
+    exactly the user's wallets, that job is returned instead of a new one.
+    Returns tuple: (job, created_bool)
+    """
+    job = SyncJob.objects.filter(user=user, status=SyncJob.Status.RUNNING).first()
+    if job:
+        return job, False
+
+    latest = latest_current_job(user)
+    if latest:
+        return latest, False
+
+    try:
+        with transaction.atomic():
+            job = SyncJob.objects.create(user=user)
+            wallets = Wallet.objects.filter(walletuser__user=user)
+            
+            # Items are claimed in pk order, so create them most valuable first.
+            # Wallets synced recently count as done without another upstream call.
+            stale_ids = prioritize_wallets(stale_wallets(wallets))
+            fresh_ids = wallets.exclude(id__in=stale_ids).values_list('id', flat=True)
+            SyncJobItem.objects.bulk_create(
+                [SyncJobItem(job=job, wallet_id=wallet_id) for wallet_id in stale_ids]
+                + [SyncJobItem(job=job, wallet_id=wallet_id, status=SyncJobItem.Status.DONE) for wallet_id in fresh_ids]
+            )
+    except IntegrityError:
+        # A concurrent request created the job first; attach to that one
+        return SyncJob.objects.get(user=user, status=SyncJob.Status.RUNNING), False
+    return job, True
+
+
+def latest_current_job(user):
+    """
+    The user's most recent completed job if syncing now would have nothing
+    to fetch and the job's items match the user's current wallets, else None
+    """
+    wallets = Wallet.objects.filter(walletuser__user=user)
+    if stale_wallets(wallets).exists():
+        return None
+
+    job = SyncJob.objects.filter(user=user, status=SyncJob.Status.COMPLETED).order_by('-pk').first()
+    if job is None:
+        return None
+    job_wallets = job.items.values('wallet_id')
+    if job.items.count() != wallets.count() or wallets.exclude(id__in=job_wallets).exists():
+        # Wallets were added or removed since; a new job reports the current set
+        return None
+    return job
+
+
+def prune_sync_jobs(retention=None):
+    """Delete completed jobs (and their items) finished longer than retention ago. Returns the number of jobs deleted."""
+    retention = settings.WALLET_SYNC_JOB_RETENTION if retention is None else retention
+    expired = SyncJob.objects.filter(
+        status=SyncJob.Status.COMPLETED,
+        finished_at__lt=timezone.now() - retention,
+    )
+    # Items first in one statement, so the job delete doesn't collect them row by row
+    SyncJobItem.objects.filter(job__in=expired).delete()
+    deleted, _ = expired.delete()
+    return deleted
+
+
+def count_sync_cost(user):
+    """
+    Number of upstream fetches a sync request by user would start: none if it
+    would attach to a running job, otherwise one per stale wallet.
+    """
+    if SyncJob.objects.filter(user=user, status=SyncJob.Status.RUNNING).exists():
+        return 0
+    return stale_wallets(Wallet.objects.filter(walletuser__user=user)).count()
+
+
+def claim_next_item(job):
+    """
+    Atomically claim the next item of job that needs work, or return None.
+    Items claimed by a processor that died are picked up again once their claim expires.
+    """
+    stale_before = timezone.now() - settings.WALLET_SYNC_CLAIM_TIMEOUT
+    claimable = Q(status=SyncJobItem.Status.PENDING) | Q(
+        status=SyncJobItem.Status.RUNNING, claimed_at__lt=stale_before
+    )
+
+    while True:
+        item = job.items.filter(claimable).select_related('wallet').order_by('pk').first()
+        if item is None:
+            return None
+
+        claimed = SyncJobItem.objects.filter(claimable, pk=item.pk).update(
+            status=SyncJobItem.Status.RUNNING,
+            claimed_at=timezone.now(),
+        )
+        if claimed:
+            return item
+        # Another processor got there first, try the next one
+
+
+def run_sync_job(job, budget=None):
+    """
+    Work through the job's remaining wallets, stopping once budget (a timedelta)
+    runs out. Safe to call from several processes at once and to call again
+    after a crash. Returns the number of wallets processed.
+    """
+    deadline = time.monotonic() + budget.total_seconds() if budget is not None else None
+    processed = 0
+    refreshed_wallet_ids = []
+
+    while deadline is None or time.monotonic() < deadline:
+        item = claim_next_item(job)
+        if item is None:
+            break
+
+        try:
+            success, error = refresh_wallet(item.wallet)
+        except Exception as e:
+            logger.exception(
+                "Error syncing wallet %s (%s)", item.wallet.address, item.wallet.chain,
+                extra={'wallet_id': item.wallet_id, 'sync_job_id': job.pk},
+            )
+            success, error = False, str(e)
+
+        item.status = SyncJobItem.Status.DONE if success else SyncJobItem.Status.FAILED
+        item.error = error or ''
+        item.save(update_fields=['status', 'error'])
+        processed += 1
+        if success:
+            refreshed_wallet_ids.append(item.wallet_id)
+
+    # One summary pass for everything this slice changed
+    if refreshed_wallet_ids:
+        refresh_portfolio_summaries(wallet_ids=refreshed_wallet_ids)
+    finish_sync_job(job)
+    return processed
+
+
+def finish_sync_job(job):
+    """Mark job completed if none of its items are left to process"""
+    unfinished = job.items.filter(status__in=[SyncJobItem.Status.PENDING, SyncJobItem.Status.RUNNING])
+    if job.status == SyncJob.Status.RUNNING and not unfinished.exists():
+        now = timezone.now()
+        SyncJob.objects.filter(pk=job.pk, status=SyncJob.Status.RUNNING).update(
+            status=SyncJob.Status.COMPLETED,
+            finished_at=now,
+            updated_at=now,
+        )
+        job.refresh_from_db()
+
+
+def get_job_progress(job):
+    """Return per-status item counts for job"""
+    return job.items.aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status__in=[SyncJobItem.Status.PENDING, SyncJobItem.Status.RUNNING])),
+        done=Count('id', filter=Q(status=SyncJobItem.Status.DONE)),
+        failed=Count('id', filter=Q(status=SyncJobItem.Status.FAILED)),
+    )
@@ -0,0 +1,19 @@
+# wallets/management/commands/moralis_cache_stats.py
+from django.core.management.base import BaseCommand
+from wallets.services import MoralisService
+
+
+class Command(BaseCommand):
+    help = "Report hit rate of the Moralis net-worth negative cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Reset the counters after reporting")
+
+    def handle(self, *args, **options):
+        stats = MoralisService.get_negative_cache_stats()
+        self.stdout.write(
+            f"Negative cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.1%} hit rate)"
+        )
+        if options['reset']:
+            MoralisService.reset_negative_cache_stats()
@@ -0,0 +1,23 @@
+# wallets/management/commands/process_wallet_events.py
+import time
+from django.core.management.base import BaseCommand
+from wallets.streams import process_wallet_events
+
+
+class Command(BaseCommand):
+    help = "Refresh wallets that have pending on-chain activity events, debounced per wallet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new events")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds between polls with --loop")
+        parser.add_argument('--batch-size', type=int, default=100, help="Maximum wallets refreshed per pass")
+
+    def handle(self, *args, **options):
+        while True:
+            refreshed = process_wallet_events(batch_size=options['batch_size'])
+            if refreshed:
+                self.stdout.write(f"Refreshed {refreshed} wallets")
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
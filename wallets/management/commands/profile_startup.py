@@ -0,0 +1,63 @@
+# wallets/management/commands/profile_startup.py
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter: load the WSGI app plus the URLconf (what a worker
+# needs before its first response) and report wall time and peak RSS
+STARTUP_SNIPPET = """
+import json, resource, time
+started = time.perf_counter()
+import backend.wsgi
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({
+    'seconds': time.perf_counter() - started,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Profile a cold start of the WSGI app: wall time, per-process RSS and the slowest imports"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help="Number of fresh interpreters to start")
+        parser.add_argument('--top', type=int, default=15, help="Number of slowest imports to list")
+
+    def handle(self, *args, **options):
+        timings = []
+        rss = []
+        self_times = defaultdict(list)
+
+        for _ in range(options['runs']):
+            result = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', STARTUP_SNIPPET],
+                cwd=settings.BASE_DIR,
+                env=os.environ.copy(),
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            timings.append(stats['seconds'])
+            rss.append(stats['max_rss_kb'])
+
+            # Lines look like "import time:  self [us] | cumulative | module"
+            for line in result.stderr.splitlines():
+                if not line.startswith('import time:') or 'self [us]' in line:
+                    continue
+                self_us, _, module = line[len('import time:'):].split('|', 2)
+                self_times[module.strip()].append(int(self_us))
+
+        self.stdout.write(f"Startup: median {statistics.median(timings) * 1000:.1f} ms over {len(timings)} runs")
+        self.stdout.write(f"Peak RSS per process: median {statistics.median(rss) / 1024:.1f} MiB")
+        self.stdout.write("Slowest imports (median self time):")
+        slowest = sorted(self_times.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+        for module, samples in slowest[:options['top']]:
+            self.stdout.write(f"  {statistics.median(samples) / 1000:8.2f} ms  {module}")
@@ -0,0 +1,13 @@
+# wallets/management/commands/rebuild_portfolio_summaries.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from wallets.services import refresh_portfolio_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild every user's PortfolioSummary from the wallet tables (repairs drift or missing rows)"
+
+    def handle(self, *args, **options):
+        user_ids = get_user_model().objects.values_list('pk', flat=True)
+        written = refresh_portfolio_summaries(user_ids=user_ids)
+        self.stdout.write(f"Rebuilt {written} portfolio summaries")
@@ -0,0 +1,28 @@
+# wallets/management/commands/refresh_token_prices.py
+from django.core.management.base import BaseCommand
+from wallets.models import WalletHolding
+from wallets.services import refresh_token_prices, revalue_holdings
+
+
+class Command(BaseCommand):
+    help = "Refresh the shared token price cache and revalue holdings from it, without refetching balances"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chain', action='append', help="Only refresh this chain (repeatable)")
+        parser.add_argument(
+            '--skip-fetch',
+            action='store_true',
+            help="Revalue from the prices already cached instead of calling Moralis",
+        )
+
+    def handle(self, *args, **options):
+        chains = options['chain'] or list(
+            WalletHolding.objects.values_list('wallet__chain', flat=True).distinct()
+        )
+
+        for chain in chains:
+            if not options['skip_fetch']:
+                stored = refresh_token_prices(chain)
+                self.stdout.write(f"{chain}: cached {stored} prices")
+            revalued = revalue_holdings(chain)
+            self.stdout.write(f"{chain}: revalued {revalued} holdings")
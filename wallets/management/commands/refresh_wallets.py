@@ -0,0 +1,31 @@
+# wallets/management/commands/refresh_wallets.py
+from django.core.management.base import BaseCommand
+from wallets.models import Wallet
+from wallets.scheduling import prioritize_wallets, stale_wallets
+from wallets.services import refresh_wallet, refresh_portfolio_summaries
+
+
+class Command(BaseCommand):
+    help = "Refresh the stale wallets that matter most, spending at most --budget upstream fetches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget', type=int, required=True, help="Maximum number of wallets to refresh")
+        parser.add_argument('--chain', help="Only consider wallets on this chain")
+
+    def handle(self, *args, **options):
+        wallets = stale_wallets(Wallet.objects.all())
+        if options['chain']:
+            wallets = wallets.filter(chain=options['chain'])
+
+        wallet_ids = prioritize_wallets(wallets, budget=options['budget'])
+        wallets_by_id = Wallet.objects.in_bulk(wallet_ids)
+
+        refreshed_ids = []
+        for wallet_id in wallet_ids:
+            success, _ = refresh_wallet(wallets_by_id[wallet_id])
+            if success:
+                refreshed_ids.append(wallet_id)
+        refresh_portfolio_summaries(wallet_ids=refreshed_ids)
+        refreshed = len(refreshed_ids)
+
+        self.stdout.write(f"Refreshed {refreshed} of {len(wallet_ids)} scheduled wallets")
@@ -0,0 +1,38 @@
+# wallets/management/commands/replay_wallet_events.py
+import json
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from wallets.streams import ingest_stream_payload, process_wallet_events
+
+
+class Command(BaseCommand):
+    help = "Replay recorded Moralis Streams payloads (a JSON array or one payload per line) through ingestion"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File of recorded payloads")
+        parser.add_argument(
+            '--process',
+            action='store_true',
+            help="Refresh the affected wallets right away instead of waiting for the debounce window",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path']) as f:
+                content = f.read()
+        except OSError as e:
+            raise CommandError(str(e))
+
+        try:
+            payloads = json.loads(content)
+            if isinstance(payloads, dict):
+                payloads = [payloads]
+        except json.JSONDecodeError:
+            payloads = [json.loads(line) for line in content.splitlines() if line.strip()]
+
+        queued = sum(ingest_stream_payload(payload) for payload in payloads)
+        self.stdout.write(f"Replayed {len(payloads)} payloads, queued {queued} events")
+
+        if options['process']:
+            refreshed = process_wallet_events(debounce=timedelta(0), max_delay=timedelta(0), batch_size=queued or 1)
+            self.stdout.write(f"Refreshed {refreshed} wallets")
@@ -0,0 +1,28 @@
+# wallets/management/commands/run_sync_jobs.py
+import time
+from django.core.management.base import BaseCommand
+from wallets.jobs import prune_sync_jobs, run_sync_job
+from wallets.models import SyncJob
+
+
+class Command(BaseCommand):
+    help = "Process running wallet sync jobs in the background, resuming any left unfinished, and prune old finished ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new jobs")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds between polls with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            for job in SyncJob.objects.filter(status=SyncJob.Status.RUNNING).order_by('created_at'):
+                processed = run_sync_job(job)
+                if processed:
+                    self.stdout.write(f"Job {job.pk}: processed {processed} wallets ({job.status})")
+
+            pruned = prune_sync_jobs()
+            if pruned:
+                self.stdout.write(f"Pruned {pruned} finished jobs")
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,29 @@
+# wallets/management/commands/run_sync_worker.py
+import time
+from django.core.management.base import BaseCommand
+from wallets.sharding import default_worker_name, release_partitions, run_partition_worker
+
+
+class Command(BaseCommand):
+    help = "Keep wallets fresh in the background; start one per process/node and they split the work between them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--name', help="Worker name (default: hostname:pid)")
+        parser.add_argument('--batch-size', type=int, default=100, help="Wallets refreshed per round")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to idle when nothing is stale")
+        parser.add_argument('--once', action='store_true', help="Run a single round and exit")
+
+    def handle(self, *args, **options):
+        name = options['name'] or default_worker_name()
+        try:
+            while True:
+                processed = run_partition_worker(name, options['batch_size'])
+                if processed:
+                    self.stdout.write(f"Worker {name}: processed {processed} wallets")
+
+                if options['once']:
+                    break
+                if not processed:
+                    time.sleep(options['interval'])
+        finally:
+            release_partitions(name)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletHolding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token_address', models.CharField(max_length=255)),
+                ('symbol', models.CharField(blank=True, max_length=50)),
+                ('amount', models.DecimalField(decimal_places=18, max_digits=48)),
+                ('usd_value', models.DecimalField(blank=True, decimal_places=2, max_digits=18, null=True)),
+                ('price_ts', models.DateTimeField(blank=True, null=True)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holdings', to='wallets.wallet')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['wallet', '-usd_value'], name='holding_wallet_value_idx')],
+                'unique_together': {('wallet', 'token_address')},
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0002_walletholding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chain', models.CharField(max_length=50)),
+                ('token_address', models.CharField(max_length=255)),
+                ('usd_price', models.DecimalField(decimal_places=18, max_digits=38)),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'unique_together': {('chain', 'token_address')},
+            },
+        ),
+    ]
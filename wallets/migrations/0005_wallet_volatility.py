@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0004_syncjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='volatility',
+            field=models.FloatField(default=0),
+        ),
+    ]
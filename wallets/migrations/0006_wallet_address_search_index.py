@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+# The admin's ^/= searches compile to UPPER("address"::text) LIKE/= UPPER(...) on Postgres.
+# A text_pattern_ops expression index serves both, regardless of the database collation.
+CREATE_INDEX = (
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS wallet_address_upper_like_idx '
+    'ON wallets_wallet (UPPER("address"::text) text_pattern_ops)'
+)
+DROP_INDEX = 'DROP INDEX CONCURRENTLY IF EXISTS wallet_address_upper_like_idx'
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_INDEX)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    # CONCURRENTLY can't run inside a transaction, and avoids locking a large table
+    atomic = False
+
+    dependencies = [
+        ('wallets', '0005_wallet_volatility'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
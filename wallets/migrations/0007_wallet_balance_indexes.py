@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:59
+
+from django.db import migrations, models
+
+
+INDEXES = [
+    models.Index(fields=['-balance_usd', '-id'], name='wallet_balance_idx'),
+    models.Index(fields=['chain', '-balance_usd', '-id'], name='wallet_chain_balance_idx'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    Wallet = apps.get_model('wallets', 'Wallet')
+    for index in INDEXES:
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.add_index(Wallet, index, concurrently=True)
+        else:
+            schema_editor.add_index(Wallet, index)
+
+
+def drop_indexes(apps, schema_editor):
+    Wallet = apps.get_model('wallets', 'Wallet')
+    for index in INDEXES:
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.remove_index(Wallet, index, concurrently=True)
+        else:
+            schema_editor.remove_index(Wallet, index)
+
+
+class Migration(migrations.Migration):
+
+    # CONCURRENTLY can't run inside a transaction, and avoids locking a large table
+    atomic = False
+
+    dependencies = [
+        ('wallets', '0006_wallet_address_search_index'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(create_indexes, drop_indexes)],
+            state_operations=[migrations.AddIndex(model_name='wallet', index=index) for index in INDEXES],
+        ),
+    ]
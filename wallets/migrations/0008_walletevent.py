@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0007_wallet_balance_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='wallets.wallet')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['wallet', 'received_at'], name='walletevent_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_customuser_email_search_index'),
+        ('wallets', '0008_walletevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='portfolio_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_usd', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('chain_totals', models.JSONField(default=dict)),
+                ('wallet_count', models.PositiveIntegerField(default=0)),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
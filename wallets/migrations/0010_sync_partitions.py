@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:06
+
+import zlib
+from django.db import migrations, models
+
+# Frozen copy of wallets.models.SYNC_PARTITIONS / wallet_partition at the time of this migration
+SYNC_PARTITIONS = 64
+
+
+def assign_partitions(apps, schema_editor):
+    Wallet = apps.get_model('wallets', 'Wallet')
+    SyncPartition = apps.get_model('wallets', 'SyncPartition')
+
+    SyncPartition.objects.bulk_create([SyncPartition(number=n) for n in range(SYNC_PARTITIONS)])
+
+    batch = []
+    for wallet in Wallet.objects.only('id', 'address', 'chain').iterator(chunk_size=2000):
+        wallet.sync_partition = zlib.crc32(f"{wallet.chain}:{wallet.address.lower()}".encode()) % SYNC_PARTITIONS
+        batch.append(wallet)
+        if len(batch) >= 2000:
+            Wallet.objects.bulk_update(batch, ['sync_partition'])
+            batch = []
+    Wallet.objects.bulk_update(batch, ['sync_partition'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0009_portfoliosummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncPartition',
+            fields=[
+                ('number', models.PositiveSmallIntegerField(primary_key=True, serialize=False)),
+                ('owner', models.CharField(blank=True, max_length=255)),
+                ('lease_expires_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SyncWorker',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('heartbeat_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='wallet',
+            name='sync_partition',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='wallet',
+            index=models.Index(fields=['sync_partition', 'synced_at'], name='wallet_partition_synced_idx'),
+        ),
+        migrations.RunPython(assign_partitions, migrations.RunPython.noop),
+    ]
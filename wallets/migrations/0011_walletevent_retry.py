@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallets', '0010_sync_partitions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='walletevent',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='walletevent',
+            name='retry_after',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+# The holdings admin's ^token_address / =symbol searches compile to UPPER(col::text) LIKE/= UPPER(...)
+# on Postgres. text_pattern_ops expression indexes serve both, regardless of the database collation.
+INDEXES = {
+    'holding_token_address_upper_like_idx': 'UPPER("token_address"::text) text_pattern_ops',
+    'holding_symbol_upper_like_idx': 'UPPER("symbol"::text) text_pattern_ops',
+}
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for name, expression in INDEXES.items():
+            schema_editor.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON wallets_walletholding ({expression})'
+            )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for name in INDEXES:
+            schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    # CONCURRENTLY can't run inside a transaction, and avoids locking the largest table
+    atomic = False
+
+    dependencies = [
+        ('wallets', '0011_walletevent_retry'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -1,6 +1,16 @@
+import zlib
 from django.db import models
 from django.conf import settings
 
+# Background refresh work is split into this many fixed partitions, which
+# sync workers lease between themselves. Changing it means rehashing every wallet.
+SYNC_PARTITIONS = 64
+
+
+def wallet_partition(address, chain):
+    """Stable partition number for a wallet, the same in every process"""
+    return zlib.crc32(f"{chain}:{address.lower()}".encode()) % SYNC_PARTITIONS
+
 class Wallet(models.Model):
     """
     Simple model to store wallet information and balance
@@ -9,10 +19,26 @@ class Wallet(models.Model):
     chain = models.CharField(max_length=50)  
     balance_usd = models.DecimalField(max_digits=18, decimal_places=2, null=True, blank=True)
     synced_at = models.DateTimeField(auto_now=True)
+    # Moving average of relative balance change per hour, used to prioritize refreshes
+    volatility = models.FloatField(default=0)
+    # Which sync partition refreshes this wallet in the background (see wallet_partition)
+    sync_partition = models.PositiveSmallIntegerField(default=0)
     
     class Meta:
         # Ensure each wallet address is unique per chain
         unique_together = ('address', 'chain')
+        indexes = [
+            # Table-wide balance ordering, optionally per chain: the admin changelist sorted by balance.
+            # Per-user lists can't use these, see WalletKeysetPagination
+            models.Index(fields=['-balance_usd', '-id'], name='wallet_balance_idx'),
+            models.Index(fields=['chain', '-balance_usd', '-id'], name='wallet_chain_balance_idx'),
+            # Sync workers look for stale wallets within the partitions they hold
+            models.Index(fields=['sync_partition', 'synced_at'], name='wallet_partition_synced_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        self.sync_partition = wallet_partition(self.address, self.chain)
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.address} ({self.chain})"
@@ -27,3 +53,160 @@ class WalletUser(models.Model):
     class Meta:
         # Each user can have a wallet address only once
         unique_together = ('user', 'wallet')
+
+class WalletHolding(models.Model):
+    """
+    Token-level balance for a wallet, refreshed whenever the wallet syncs
+    """
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='holdings')
+    # Lowercased contract address as reported by Moralis (native coins use Moralis' placeholder address)
+    token_address = models.CharField(max_length=255)
+    symbol = models.CharField(max_length=50, blank=True)
+    amount = models.DecimalField(max_digits=48, decimal_places=18)
+    usd_value = models.DecimalField(max_digits=18, decimal_places=2, null=True, blank=True)
+    # When usd_value was priced; null for tokens Moralis couldn't price
+    price_ts = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # One row per token per wallet so sync can upsert on it
+        unique_together = ('wallet', 'token_address')
+        indexes = [
+            # Serves "top holdings" for a set of wallets without sorting every row
+            models.Index(fields=['wallet', '-usd_value'], name='holding_wallet_value_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.amount} {self.symbol or self.token_address} in {self.wallet}"
+
+class TokenPrice(models.Model):
+    """
+    Shared USD price cache per token, used to revalue holdings without refetching balances
+    """
+    chain = models.CharField(max_length=50)
+    # Lowercased contract address, matching WalletHolding.token_address
+    token_address = models.CharField(max_length=255)
+    usd_price = models.DecimalField(max_digits=38, decimal_places=18)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        # One cached price per token per chain
+        unique_together = ('chain', 'token_address')
+
+    def __str__(self):
+        return f"{self.token_address} ({self.chain}): ${self.usd_price}"
+
+class SyncJob(models.Model):
+    """
+    A persisted wallet sync for one user, so the work survives dropped
+    requests and worker restarts
+    """
+    class Status(models.TextChoices):
+        RUNNING = 'running', 'Running'
+        COMPLETED = 'completed', 'Completed'
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sync_jobs')
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.RUNNING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # Repeated sync requests attach to the running job instead of starting another
+            models.UniqueConstraint(
+                fields=['user'],
+                condition=models.Q(status='running'),
+                name='one_running_sync_job_per_user',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Sync job {self.pk} for user {self.user_id} ({self.status})"
+
+class SyncJobItem(models.Model):
+    """
+    Per-wallet progress within a sync job
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    job = models.ForeignKey(SyncJob, on_delete=models.CASCADE, related_name='items')
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    error = models.TextField(blank=True)
+    # Set when a processor claims the item; stale claims are retried after a crash
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # Each wallet is synced at most once per job
+        unique_together = ('job', 'wallet')
+        indexes = [
+            models.Index(fields=['job', 'status'], name='syncitem_job_status_idx'),
+        ]
+
+class WalletEvent(models.Model):
+    """
+    On-chain activity reported for a tracked wallet, queued until the wallet is refreshed
+    """
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='events')
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    # Failed refreshes leave the events pending and back off before trying the wallet again
+    attempts = models.PositiveSmallIntegerField(default=0)
+    retry_after = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The processor only ever looks at unprocessed events
+            models.Index(
+                fields=['wallet', 'received_at'],
+                condition=models.Q(processed_at__isnull=True),
+                name='walletevent_pending_idx',
+            ),
+        ]
+
+class PortfolioSummary(models.Model):
+    """
+    Denormalized per-user portfolio totals, kept current as balances and wallet links change
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='portfolio_summary',
+    )
+    total_usd = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    # {chain: "total as a decimal string"}
+    chain_totals = models.JSONField(default=dict)
+    wallet_count = models.PositiveIntegerField(default=0)
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Portfolio of user {self.user_id}: ${self.total_usd}"
+
+class SyncWorker(models.Model):
+    """
+    A background sync process, alive for as long as it keeps heartbeating
+    """
+    name = models.CharField(max_length=255, primary_key=True)
+    heartbeat_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.name
+
+class SyncPartition(models.Model):
+    """
+    Lease on one partition of the wallet table. Only the owning worker
+    refreshes its wallets, until the lease expires or is released.
+    """
+    number = models.PositiveSmallIntegerField(primary_key=True)
+    # Name of the SyncWorker holding the lease; blank when unowned
+    owner = models.CharField(max_length=255, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Partition {self.number} ({self.owner or 'unowned'})"
@@ -0,0 +1,124 @@
+# wallets/pagination.py
+import base64
+import json
+from decimal import Decimal, InvalidOperation
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class WalletKeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination for wallet lists.
+
+    Pages are ordered by (sort key, id) and each page starts strictly after the
+    last row of the previous one, so the cost of a page doesn't grow with how
+    deep the client has scrolled and ties (e.g. lots of 0.00 balances) don't
+    fall back to OFFSET. NULL balances sort as the largest value, matching the
+    Postgres default for descending indexes.
+
+    Wallet lists are always filtered to one user, so the keyset doesn't walk
+    an index in sort order: the user's wallets are found through the
+    (user, wallet) unique index on WalletUser and then sorted. Each page
+    therefore costs O(n log n) in the size of that user's portfolio (tens of
+    wallets in practice), but stays independent of the wallet table's size
+    and of the cursor's depth.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+    page_size = 50
+    max_page_size = 200
+
+    # ordering value -> (sort field, descending)
+    ORDERINGS = {
+        'id': ('id', False),
+        '-id': ('id', True),
+        'balance_usd': ('balance_usd', False),
+        '-balance_usd': ('balance_usd', True),
+    }
+    default_ordering = 'id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = self.order_queryset(queryset, request)
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(self.get_after_filter(*cursor))
+
+        # Fetch one extra row to know whether there is a next page
+        page = list(queryset[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        self.page = page[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def order_queryset(self, queryset, request):
+        """Apply the validated ?ordering= to queryset; also used for the unpaginated list"""
+        self.ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if self.ordering not in self.ORDERINGS:
+            raise ValidationError({
+                self.ordering_query_param: f"Must be one of: {', '.join(self.ORDERINGS)}"
+            })
+        self.field, self.descending = self.ORDERINGS[self.ordering]
+        return queryset.order_by(*self.get_order_by())
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: "Must be an integer"})
+        return max(1, min(size, self.max_page_size))
+
+    def get_order_by(self):
+        if self.field == 'id':
+            return ['-id' if self.descending else 'id']
+        if self.descending:
+            return [F(self.field).desc(nulls_first=True), '-id']
+        return [F(self.field).asc(nulls_last=True), 'id']
+
+    def get_after_filter(self, value, last_id):
+        """Rows that sort strictly after (value, last_id) in the current ordering"""
+        id_after = Q(id__lt=last_id) if self.descending else Q(id__gt=last_id)
+        if self.field == 'id':
+            return id_after
+
+        is_null = Q(**{f"{self.field}__isnull": True})
+        if value is None:
+            # NULLs come first when descending and last when ascending
+            return (is_null & id_after) | ~is_null if self.descending else is_null & id_after
+
+        beyond = Q(**{f"{self.field}__lt" if self.descending else f"{self.field}__gt": value})
+        tied = Q(**{self.field: value}) & id_after
+        return beyond | tied if self.descending else beyond | tied | is_null
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        value = None if self.field == 'id' else getattr(last, self.field)
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.ordering_query_param, self.ordering)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(value, last.pk))
+
+    def encode_cursor(self, value, last_id):
+        payload = json.dumps([None if value is None else str(value), last_id])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            value, last_id = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            return (None if value is None else Decimal(value)), int(last_id)
+        except (ValueError, TypeError, InvalidOperation):
+            raise NotFound("Invalid cursor")
@@ -0,0 +1,70 @@
+# wallets/scheduling.py
+import heapq
+import math
+from django.conf import settings
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import WalletUser
+
+# Every wallet is assumed to drift at least this much per hour, so calm wallets still age into a refresh
+BASELINE_VOLATILITY = 0.01
+# Added to balances so empty wallets aren't starved forever
+DUST_BALANCE_USD = 1.0
+
+
+def staleness_cost(balance_usd, volatility, synced_at, link_count, now):
+    """
+    Estimate the USD error users are looking at because this wallet hasn't been
+    refreshed: value x expected drift per hour x hours since sync x linked users.
+    Wallets that have never produced a balance always come first.
+    """
+    if balance_usd is None:
+        return math.inf
+
+    age_hours = max((now - synced_at).total_seconds() / 3600, 0.0)
+    return (
+        (float(balance_usd) + DUST_BALANCE_USD)
+        * (volatility + BASELINE_VOLATILITY)
+        * age_hours
+        * max(link_count, 1)
+    )
+
+
+def prioritize_wallets(wallets, budget=None, now=None):
+    """
+    Order a Wallet queryset by expected staleness cost, highest first, and
+    return at most budget wallet ids. Only the fields needed for scoring are
+    read, and with a budget only the top entries are kept in memory.
+    """
+    now = now or timezone.now()
+    # Counted in a subquery: a join would reuse any walletuser filter already on
+    # the queryset (e.g. one user's wallets) and count only that user's link
+    link_counts = (
+        WalletUser.objects.filter(wallet=OuterRef('pk'))
+        .order_by()
+        .values('wallet')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    rows = (
+        wallets.annotate(link_count=Coalesce(Subquery(link_counts), 0))
+        .values_list('id', 'balance_usd', 'volatility', 'synced_at', 'link_count')
+        .iterator()
+    )
+    scored = (
+        (staleness_cost(balance_usd, volatility, synced_at, link_count, now), wallet_id)
+        for wallet_id, balance_usd, volatility, synced_at, link_count in rows
+    )
+
+    if budget is None:
+        ranked = sorted(scored, reverse=True)
+    else:
+        ranked = heapq.nlargest(budget, scored)
+    return [wallet_id for _, wallet_id in ranked]
+
+
+def stale_wallets(wallets, now=None):
+    """Narrow a Wallet queryset to wallets due for a refresh, including ones that never got a balance"""
+    now = now or timezone.now()
+    return wallets.filter(Q(synced_at__lt=now - settings.WALLET_STALE_AFTER) | Q(balance_usd__isnull=True))
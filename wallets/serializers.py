@@ -1,6 +1,7 @@
 # wallet/serializers.py
 from rest_framework import serializers
-from .models import Wallet, WalletUser
+from .models import Wallet, WalletUser, WalletHolding, SyncJob, PortfolioSummary
+from .jobs import get_job_progress
 
 class AddWalletSerializer(serializers.Serializer):
     """Serializer for adding a new wallet"""
@@ -39,7 +40,44 @@ class AddWalletSerializer(serializers.Serializer):
         return attrs
 
 class WalletSerializer(serializers.ModelSerializer):
-    """Serializer for wallet data"""
+    """
+    Serializer for wallet data.
+    Pass fields=[...] to return only a subset of the fields.
+    """
     class Meta:
         model = Wallet
         fields = ['address', 'balance_usd', 'chain']
+    
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+class WalletHoldingSerializer(serializers.ModelSerializer):
+    """Serializer for a single token holding"""
+    address = serializers.CharField(source='wallet.address', read_only=True)
+    chain = serializers.CharField(source='wallet.chain', read_only=True)
+    
+    class Meta:
+        model = WalletHolding
+        fields = ['address', 'chain', 'token_address', 'symbol', 'amount', 'usd_value', 'price_ts']
+
+class SyncJobSerializer(serializers.ModelSerializer):
+    """Serializer for sync job status and progress"""
+    progress = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = SyncJob
+        fields = ['id', 'status', 'created_at', 'finished_at', 'progress']
+    
+    def get_progress(self, obj):
+        return get_job_progress(obj)
+
+class PortfolioSummarySerializer(serializers.ModelSerializer):
+    """Serializer for a user's precomputed portfolio totals"""
+    class Meta:
+        model = PortfolioSummary
+        fields = ['total_usd', 'chain_totals', 'wallet_count', 'last_synced_at', 'updated_at']
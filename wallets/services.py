@@ -1,11 +1,442 @@
 # wallet/services.py
-import requests
+import json
 import logging
-from decimal import Decimal
+import time
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP, localcontext
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import (
+    Case, Count, DecimalField, Exists, ExpressionWrapper, F, Max, OuterRef, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, Round
+from django.db.models.lookups import LessThan
+from .models import Wallet, WalletUser, WalletHolding, TokenPrice, PortfolioSummary
 
 logger = logging.getLogger(__name__)
 
+# Enough significant digits for the widest DecimalField we store
+DECIMAL_PRECISION = 60
+
+# Wallet.balance_usd is DecimalField(max_digits=18, decimal_places=2)
+USD_QUANTUM = Decimal('0.01')
+MAX_USD_AMOUNT = Decimal('1e16')
+
+# WalletHolding.amount is DecimalField(max_digits=48, decimal_places=18)
+TOKEN_QUANTUM = Decimal('1e-18')
+MAX_TOKEN_AMOUNT = Decimal('1e30')
+
+# TokenPrice.usd_price is DecimalField(max_digits=38, decimal_places=18)
+MAX_TOKEN_PRICE = Decimal('1e20')
+
+# Moralis reports native coins under this placeholder address
+NATIVE_TOKEN_ADDRESS = '0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee'
+
+# The ERC20 price endpoint can't price native coins, so we price their wrapped versions instead
+WRAPPED_NATIVE_TOKENS = {
+    'eth': '0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2',
+    'bsc': '0xbb4cdb9cbd36b01bd8cbaebf2de08d9173bc095c',
+    'polygon': '0x0d500b1d8e8ef31e21c99d1db9a6444d3adf1270',
+    'avalanche': '0xb31f66aa3c1e785363f0875a1b74e27b85fd66c7',
+    'fantom': '0x21be370d5312f44cb42ce377bc9b8a0cef1a4c83',
+    'arbitrum': '0x82af49447d8a07e3bd95bd0d56f35241523fbab1',
+    'optimism': '0x4200000000000000000000000000000000000006',
+}
+
+# Moralis accepts at most this many tokens per multi-price request
+TOKEN_PRICE_BATCH_SIZE = 25
+
+# Weight of the newest observation in Wallet.volatility
+VOLATILITY_SMOOTHING = 0.3
+# Syncs closer together than this are treated as this far apart, so quick re-syncs don't spike the rate
+MIN_VOLATILITY_WINDOW_HOURS = 0.25
+
+# How long failed net-worth lookups are remembered, in seconds, by kind of failure
+NEGATIVE_CACHE_TTLS = {
+    'no_data': 10 * 60,    # address has no activity on the chain yet
+    'invalid': 60 * 60,    # Moralis rejected the address outright
+    'transient': 30,       # rate limits, outages and network errors
+}
+# Moralis statuses that mean the address itself is bad
+PERMANENT_ERROR_STATUSES = {400, 404, 422}
+NEGATIVE_CACHE_HITS_KEY = 'moralis:neg:stats:hits'
+NEGATIVE_CACHE_MISSES_KEY = 'moralis:neg:stats:misses'
+
+# Users recomputed per aggregate query when refreshing portfolio summaries
+SUMMARY_CHUNK_SIZE = 1000
+
+# Upper bound on token balance pages fetched per wallet
+MAX_TOKEN_PAGES = 5
+
+
+def _incr_counter(key):
+    """Increment a counter in the shared cache, creating it if needed"""
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+class UpstreamTimeLimitError(Exception):
+    """Raised instead of starting a Moralis call once a refresh's time limit is used up"""
+
+
+def refresh_deadline():
+    """time.monotonic() value by which a wallet refresh must finish its upstream calls"""
+    return time.monotonic() + settings.WALLET_REFRESH_TIME_LIMIT.total_seconds()
+
+
+class InvalidBalanceError(ValueError):
+    """Raised when an upstream USD value can't be stored as a wallet balance"""
+
+
+def _parse_decimal(value, quantum, limit, label):
+    """
+    Convert a raw numeric value from Moralis into a non-negative Decimal
+    quantized to quantum and strictly below limit.
+    """
+    raw = value
+    if isinstance(value, str):
+        value = value.strip()
+    elif isinstance(value, float):
+        # Go through repr so we keep the shortest round-tripping digits
+        value = repr(value)
+    elif isinstance(value, bool) or not isinstance(value, (int, Decimal)):
+        raise InvalidBalanceError(f"Invalid {label}: {raw!r}")
+
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise InvalidBalanceError(f"Invalid {label}: {raw!r}")
+
+    # Coarse check first so quantize never sees a value too large for the context
+    if not amount.is_finite() or amount < 0 or amount >= limit:
+        raise InvalidBalanceError(f"{label.capitalize()} out of range: {raw!r}")
+    # Token amounts need up to 48 significant digits, more than the default context allows
+    with localcontext(prec=DECIMAL_PRECISION):
+        amount = amount.quantize(quantum, rounding=ROUND_HALF_UP)
+    # Rounding can carry just below the limit up to it (e.g. 9999999999999999.995 -> 1E16)
+    if amount >= limit:
+        raise InvalidBalanceError(f"{label.capitalize()} out of range: {raw!r}")
+    return amount
+
+
+def parse_usd_amount(value):
+    """
+    Convert a raw USD value from Moralis into a Decimal quantized to cents.
+    Moralis sends amounts as strings; numbers are already Decimals because
+    responses are decoded with parse_float=Decimal.
+    Raises InvalidBalanceError for anything that can't be stored on the model.
+    """
+    return _parse_decimal(value, USD_QUANTUM, MAX_USD_AMOUNT, 'USD amount')
+
+
+def parse_token_amount(value):
+    """Convert a formatted token balance into a Decimal that fits WalletHolding.amount"""
+    return _parse_decimal(value, TOKEN_QUANTUM, MAX_TOKEN_AMOUNT, 'token amount')
+
+
+def parse_token_price(value):
+    """Convert a USD token price into a Decimal that fits TokenPrice.usd_price"""
+    return _parse_decimal(value, TOKEN_QUANTUM, MAX_TOKEN_PRICE, 'token price')
+
+
+def extract_chain_balance(data, chain):
+    """
+    Find the entry for chain in a net-worth payload and return its USD balance.
+    Returns None if the payload has no data for that chain.
+    Raises InvalidBalanceError if the balance is present but malformed.
+    """
+    chains = data.get('chains', []) if isinstance(data, dict) else []
+    if not isinstance(chains, list):
+        return None
+
+    chain_data = next((c for c in chains if isinstance(c, dict) and c.get('chain') == chain), None)
+    if chain_data is None:
+        return None
+
+    # Prefer balance_usd, falling back to networth_usd when it's missing or zero
+    balance_value = chain_data.get('balance_usd')
+    balance = parse_usd_amount(balance_value) if balance_value is not None else Decimal('0.00')
+    if not balance and chain_data.get('networth_usd') is not None:
+        balance = parse_usd_amount(chain_data['networth_usd'])
+    return balance
+
+
+def parse_token_holdings(tokens):
+    """
+    Turn the result list from Moralis' wallet token balances endpoint into
+    holding dicts ready for WalletHolding. Tokens with malformed amounts are
+    skipped rather than failing the whole wallet.
+    """
+    holdings = {}
+    for token in tokens:
+        if not isinstance(token, dict) or not token.get('token_address'):
+            continue
+        try:
+            amount = parse_token_amount(token.get('balance_formatted'))
+            usd_value = token.get('usd_value')
+            usd_value = parse_usd_amount(usd_value) if usd_value is not None else None
+            usd_price = token.get('usd_price')
+            usd_price = parse_token_price(usd_price) if usd_price is not None else None
+        except InvalidBalanceError as e:
+            logger.warning("Skipping token %s: %s", token.get('token_address'), e)
+            continue
+
+        token_address = token['token_address'].lower()
+        holdings[token_address] = {
+            'token_address': token_address,
+            'symbol': (token.get('symbol') or '')[:50],
+            'amount': amount,
+            'usd_value': usd_value,
+            'usd_price': usd_price,
+        }
+    return list(holdings.values())
+
+
+def store_wallet_holdings(wallet, holdings, fetched_at=None):
+    """
+    Replace the stored holdings for wallet with the given holding dicts.
+    Uses a single bulk upsert plus one delete for tokens that are gone.
+    Prices that came along with the balances also refresh the shared price cache.
+    """
+    fetched_at = fetched_at or timezone.now()
+    rows = [
+        WalletHolding(
+            wallet=wallet,
+            token_address=h['token_address'],
+            symbol=h['symbol'],
+            amount=h['amount'],
+            usd_value=h['usd_value'],
+            price_ts=fetched_at if h['usd_value'] is not None else None,
+        )
+        for h in holdings
+    ]
+    prices = {h['token_address']: h['usd_price'] for h in holdings if h.get('usd_price') is not None}
+    with transaction.atomic():
+        store_token_prices(wallet.chain, prices, fetched_at)
+        if rows:
+            WalletHolding.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['wallet', 'token_address'],
+                update_fields=['symbol', 'amount', 'usd_value', 'price_ts'],
+            )
+        WalletHolding.objects.filter(wallet=wallet).exclude(
+            token_address__in=[h['token_address'] for h in holdings]
+        ).delete()
+
+
+def store_token_prices(chain, prices, fetched_at=None):
+    """Upsert {token_address: usd_price} into the shared price cache for chain"""
+    if not prices:
+        return
+    fetched_at = fetched_at or timezone.now()
+    TokenPrice.objects.bulk_create(
+        [
+            TokenPrice(chain=chain, token_address=token_address, usd_price=usd_price, updated_at=fetched_at)
+            for token_address, usd_price in prices.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['chain', 'token_address'],
+        update_fields=['usd_price', 'updated_at'],
+    )
+
+
+def refresh_token_prices(chain):
+    """
+    Refresh cached prices for every token currently held on chain, in batches.
+    Returns the number of prices stored.
+    """
+    token_addresses = list(
+        WalletHolding.objects.filter(wallet__chain=chain)
+        .values_list('token_address', flat=True)
+        .distinct()
+    )
+    wrapped_native = WRAPPED_NATIVE_TOKENS.get(chain.lower())
+
+    stored = 0
+    for start in range(0, len(token_addresses), TOKEN_PRICE_BATCH_SIZE):
+        batch = token_addresses[start:start + TOKEN_PRICE_BATCH_SIZE]
+        # Ask for the wrapped coin in place of the native placeholder
+        lookup = [
+            wrapped_native if a == NATIVE_TOKEN_ADDRESS and wrapped_native else a
+            for a in batch
+        ]
+        success, result = MoralisService.get_token_prices(chain, lookup)
+        if not success:
+            logger.warning("Failed to refresh prices for %d tokens on %s: %s", len(batch), chain, result, extra={'chain': chain})
+            continue
+
+        prices = {}
+        for token_address, looked_up in zip(batch, lookup):
+            if looked_up not in result:
+                continue
+            try:
+                prices[token_address] = parse_token_price(result[looked_up])
+            except InvalidBalanceError as e:
+                logger.warning("Skipping price for %s on %s: %s", token_address, chain, e, extra={'chain': chain})
+        store_token_prices(chain, prices)
+        stored += len(prices)
+    return stored
+
+
+def revalue_holdings(chain):
+    """
+    Recompute usd_value for every holding on chain from cached prices, then
+    roll the results up into Wallet.balance_usd. Runs as two set-based UPDATEs
+    instead of touching rows one by one. Returns the number of holdings revalued.
+    """
+    price = TokenPrice.objects.filter(chain=chain, token_address=OuterRef('token_address'))
+    new_value = Round(
+        ExpressionWrapper(
+            Subquery(price.values('usd_price')[:1]) * F('amount'),
+            output_field=DecimalField(max_digits=18, decimal_places=2),
+        ),
+        2,
+    )
+
+    with transaction.atomic():
+        # Only holdings with a cached price; values that wouldn't fit the column are dropped
+        fits = LessThan(new_value, Value(MAX_USD_AMOUNT))
+        revalued = WalletHolding.objects.filter(wallet__chain=chain).filter(Exists(price)).update(
+            usd_value=Case(When(fits, then=new_value), default=Value(None)),
+            price_ts=Case(When(fits, then=Subquery(price.values('updated_at')[:1])), default=Value(None)),
+        )
+
+        holdings_total = (
+            WalletHolding.objects.filter(wallet=OuterRef('pk'))
+            .values('wallet')
+            .annotate(total=Sum('usd_value'))
+            .values('total')
+        )
+        revalued_wallets = Wallet.objects.filter(chain=chain).filter(
+            Exists(WalletHolding.objects.filter(wallet=OuterRef('pk')))
+        )
+        revalued_wallets.update(
+            balance_usd=Coalesce(Subquery(holdings_total), Value(Decimal('0.00'))),
+        )
+        refresh_portfolio_summaries(wallet_ids=revalued_wallets.values_list('id', flat=True))
+    return revalued
+
+
+def refresh_wallet(wallet):
+    """
+    Fetch the latest balance and token holdings for wallet and save them,
+    spending at most WALLET_REFRESH_TIME_LIMIT on Moralis calls.
+    Returns tuple: (success_bool, error_message_or_None)
+    """
+    deadline = refresh_deadline()
+    success, result = MoralisService.get_wallet_net_worth(wallet.address, wallet.chain, deadline=deadline)
+    if not success or not isinstance(result, dict):
+        logger.warning(
+            "Failed to sync wallet %s (%s): %s", wallet.address, wallet.chain, result, extra={'wallet_id': wallet.id}
+        )
+        return False, result if isinstance(result, str) else 'Failed to retrieve wallet data'
+
+    try:
+        balance_value = extract_chain_balance(result, wallet.chain)
+    except InvalidBalanceError as e:
+        logger.warning(
+            "Rejected balance for wallet %s (%s): %s", wallet.address, wallet.chain, e, extra={'wallet_id': wallet.id}
+        )
+        return False, str(e)
+
+    if balance_value is None:
+        logger.warning(
+            "No data found for wallet %s on chain %s", wallet.address, wallet.chain, extra={'wallet_id': wallet.id}
+        )
+        return False, f"No data found for chain: {wallet.chain}"
+
+    update_volatility(wallet, balance_value)
+    wallet.balance_usd = balance_value
+    wallet.save()
+    sync_wallet_holdings(wallet, deadline=deadline)
+    return True, None
+
+
+def refresh_portfolio_summaries(user_ids=None, wallet_ids=None):
+    """
+    Recompute PortfolioSummary rows for the given users, or for every user
+    linked to the given wallets (ids or a values_list queryset). Only affected
+    users are touched: one grouped aggregate and one bulk upsert per chunk.
+    Returns the number of summaries written.
+    """
+    if wallet_ids is not None:
+        user_ids = WalletUser.objects.filter(wallet_id__in=wallet_ids).values_list('user_id', flat=True)
+    user_ids = sorted(set(user_ids or []))
+
+    written = 0
+    for start in range(0, len(user_ids), SUMMARY_CHUNK_SIZE):
+        chunk = user_ids[start:start + SUMMARY_CHUNK_SIZE]
+        # Users without wallets still get a (zeroed) row
+        summaries = {
+            user_id: PortfolioSummary(user_id=user_id, total_usd=Decimal('0.00'), chain_totals={}, wallet_count=0)
+            for user_id in chunk
+        }
+
+        rows = (
+            WalletUser.objects.filter(user_id__in=chunk)
+            .values('user_id', 'wallet__chain')
+            .annotate(
+                total=Sum('wallet__balance_usd'),
+                wallets=Count('id'),
+                last_synced=Max('wallet__synced_at'),
+            )
+        )
+        for row in rows:
+            summary = summaries[row['user_id']]
+            chain_total = (row['total'] or Decimal('0')).quantize(USD_QUANTUM)
+            summary.total_usd += chain_total
+            summary.chain_totals[row['wallet__chain']] = str(chain_total)
+            summary.wallet_count += row['wallets']
+            if summary.last_synced_at is None or row['last_synced'] > summary.last_synced_at:
+                summary.last_synced_at = row['last_synced']
+
+        PortfolioSummary.objects.bulk_create(
+            summaries.values(),
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['total_usd', 'chain_totals', 'wallet_count', 'last_synced_at', 'updated_at'],
+        )
+        written += len(summaries)
+    return written
+
+
+def update_volatility(wallet, new_balance, now=None):
+    """
+    Fold the change from the wallet's current balance to new_balance into its
+    volatility moving average. Call before assigning the new balance.
+    """
+    if wallet.balance_usd is None or wallet.synced_at is None:
+        return
+
+    now = now or timezone.now()
+    elapsed_hours = max((now - wallet.synced_at).total_seconds() / 3600, MIN_VOLATILITY_WINDOW_HOURS)
+    relative_change = abs(float(new_balance - wallet.balance_usd)) / max(float(wallet.balance_usd), 1.0)
+    rate = relative_change / elapsed_hours
+    wallet.volatility = VOLATILITY_SMOOTHING * rate + (1 - VOLATILITY_SMOOTHING) * wallet.volatility
+
+
+def sync_wallet_holdings(wallet, deadline=None):
+    """
+    Fetch token balances for wallet and store them, giving up at deadline (see refresh_deadline).
+    Returns True on success; failures are logged and leave old holdings in place.
+    """
+    success, result = MoralisService.get_wallet_token_balances(wallet.address, wallet.chain, deadline=deadline)
+    if not success:
+        logger.warning(
+            "Failed to fetch holdings for wallet %s (%s): %s", wallet.address, wallet.chain, result,
+            extra={'wallet_id': wallet.id},
+        )
+        return False
+
+    store_wallet_holdings(wallet, parse_token_holdings(result))
+    return True
+
+
 class MoralisService:
     """Service for interacting with Moralis API"""
     
@@ -20,13 +451,52 @@ class MoralisService:
         'optimism': 'optimism'
     }
     
+    # Shared HTTP session, created on first use in each worker process
+    _session = None
+    
     @classmethod
-    def get_wallet_net_worth(cls, address, chain=None):
+    def get_session(cls):
+        """
+        Return the shared requests session, importing requests on first use.
+        Keeping the import out of module scope keeps it off the startup path,
+        and reusing the session keeps connections to Moralis alive between calls.
+        """
+        if cls._session is None:
+            import requests
+            cls._session = requests.Session()
+        return cls._session
+    
+    @staticmethod
+    def request_timeout(deadline=None):
+        """
+        (connect, read) timeout for the next Moralis call: MORALIS_REQUEST_TIMEOUT,
+        shortened so no single wait runs past deadline (a time.monotonic() value).
+        Raises UpstreamTimeLimitError once deadline has passed.
+        """
+        connect, read = settings.MORALIS_REQUEST_TIMEOUT
+        if deadline is None:
+            return connect, read
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise UpstreamTimeLimitError("Time limit for Moralis requests used up")
+        return min(connect, remaining), min(read, remaining)
+    
+    @classmethod
+    def get_wallet_net_worth(cls, address, chain=None, deadline=None):
         """
         Fetch wallet net worth from Moralis API
         If chain is provided, will filter results for that specific chain
+        Calls are cut short at deadline, see request_timeout
+        Failures are negatively cached for a while, see NEGATIVE_CACHE_TTLS
         Returns tuple: (success_bool, data_or_error_message)
         """
+        cache_key = cls.negative_cache_key(address, chain)
+        cached_error = cache.get(cache_key)
+        if cached_error is not None:
+            _incr_counter(NEGATIVE_CACHE_HITS_KEY)
+            return False, cached_error
+        _incr_counter(NEGATIVE_CACHE_MISSES_KEY)
+        
         try:
             # Prepare the API call
             api_url = f"https://deep-index.moralis.io/api/v2.2/wallets/{address}/net-worth"
@@ -41,19 +511,24 @@ class MoralisService:
                 # Convert chain name to Moralis chain ID if needed
                 moralis_chain = cls.CHAIN_MAPPING.get(chain.lower(), chain)
                 params['chains'] = [moralis_chain]
-                logger.info(f"Querying Moralis for wallet {address} on chain {moralis_chain}")
-            else:
-                logger.info(f"Querying Moralis for wallet {address} across all chains")
+            logger.info(
+                "Querying Moralis net worth for wallet %s on %s", address, moralis_chain if chain else 'all chains',
+                extra={'upstream': 'moralis', 'endpoint': 'net-worth'},
+            )
             
             # Make the API call
-            response = requests.get(api_url, headers=headers, params=params)
-            
-            # Log the full response for debugging
-            logger.debug(f"Moralis API response: {response.text}")
+            response = cls.get_session().get(
+                api_url, headers=headers, params=params, timeout=cls.request_timeout(deadline)
+            )
+            logger.debug(
+                "Moralis net worth response: %s (%d bytes)", response.status_code, len(response.content),
+                extra={'upstream': 'moralis', 'endpoint': 'net-worth'},
+            )
             
             # Handle response
             if response.status_code == 200:
-                data = response.json()
+                # Decode numbers straight to Decimal so amounts never pass through float
+                data = json.loads(response.content, parse_float=Decimal)
                 
                 # If a specific chain was requested, filter the results
                 if chain and 'chains' in data:
@@ -67,15 +542,175 @@ class MoralisService:
                     
                     # If we couldn't find data for this chain, return an error
                     if not chain_data:
-                        return False, f"No data found for chain: {chain} (Moralis chain ID: {moralis_chain})"
+                        error_msg = f"No data found for chain: {chain} (Moralis chain ID: {moralis_chain})"
+                        cache.set(cache_key, error_msg, NEGATIVE_CACHE_TTLS['no_data'])
+                        return False, error_msg
                 
+                # A success overrides earlier failures for the chains it covers
+                if chain:
+                    succeeded = [chain]
+                else:
+                    succeeded = [c['chain'] for c in data.get('chains', []) if isinstance(c, dict) and c.get('chain')]
+                cls.clear_negative_cache(address, succeeded)
                 return True, data
             else:
                 error_msg = f"Moralis API error: {response.status_code}, {response.text}"
-                logger.error(error_msg)
+                logger.error(
+                    "Moralis net worth request for %s failed: %s", address, response.status_code,
+                    extra={'upstream': 'moralis', 'endpoint': 'net-worth', 'status': response.status_code},
+                )
+                # Bad addresses won't start working on retry; rate limits and outages will
+                kind = 'invalid' if response.status_code in PERMANENT_ERROR_STATUSES else 'transient'
+                cache.set(cache_key, error_msg, NEGATIVE_CACHE_TTLS[kind])
                 return False, error_msg
                 
         except Exception as e:
             error_msg = f"Error fetching wallet net worth: {str(e)}"
-            logger.exception(error_msg)
+            logger.exception(
+                "Error fetching wallet net worth for %s", address,
+                extra={'upstream': 'moralis', 'endpoint': 'net-worth'},
+            )
+            cache.set(cache_key, error_msg, NEGATIVE_CACHE_TTLS['transient'])
+            return False, error_msg
+    
+    @staticmethod
+    def negative_cache_key(address, chain=None):
+        """Cache key for a failed net-worth lookup; addresses are case-insensitive"""
+        return f"moralis:neg:{(chain or 'all').lower()}:{address.lower()}"
+    
+    @classmethod
+    def clear_negative_cache(cls, address, chains=None):
+        """
+        Forget cached failures for address, e.g. after a successful fetch or new on-chain activity.
+        Clears the given chains, or every supported chain when chains is None.
+        """
+        chains = list(chains) if chains is not None else list(cls.CHAIN_MAPPING)
+        cache.delete_many([cls.negative_cache_key(address, c) for c in chains + [None]])
+    
+    @staticmethod
+    def get_negative_cache_stats():
+        """Return hit/miss counts for the net-worth negative cache"""
+        hits = cache.get(NEGATIVE_CACHE_HITS_KEY, 0)
+        misses = cache.get(NEGATIVE_CACHE_MISSES_KEY, 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0,
+        }
+    
+    @staticmethod
+    def reset_negative_cache_stats():
+        cache.delete_many([NEGATIVE_CACHE_HITS_KEY, NEGATIVE_CACHE_MISSES_KEY])
+
+    @classmethod
+    def get_wallet_token_balances(cls, address, chain, deadline=None):
+        """
+        Fetch token balances (with USD prices) for a wallet on a single chain
+        Paging stops with an error once deadline passes, see request_timeout
+        Returns tuple: (success_bool, list_of_tokens_or_error_message)
+        """
+        try:
+            moralis_chain = cls.CHAIN_MAPPING.get(chain.lower(), chain)
+            api_url = f"https://deep-index.moralis.io/api/v2.2/wallets/{address}/tokens"
+            headers = {
+                'accept': 'application/json',
+                'X-API-Key': settings.MORALIS_API_KEY
+            }
+            params = {'chain': moralis_chain, 'exclude_spam': 'true'}
+            logger.info(
+                "Querying Moralis token balances for wallet %s on %s", address, moralis_chain,
+                extra={'upstream': 'moralis', 'endpoint': 'tokens'},
+            )
+
+            tokens = []
+            for _ in range(MAX_TOKEN_PAGES):
+                response = cls.get_session().get(
+                    api_url, headers=headers, params=params, timeout=cls.request_timeout(deadline)
+                )
+                if response.status_code != 200:
+                    error_msg = f"Moralis API error: {response.status_code}, {response.text}"
+                    logger.error(
+                        "Moralis token balances request for %s failed: %s", address, response.status_code,
+                        extra={'upstream': 'moralis', 'endpoint': 'tokens', 'status': response.status_code},
+                    )
+                    return False, error_msg
+
+                data = json.loads(response.content, parse_float=Decimal)
+                tokens.extend(data.get('result') or [])
+
+                # Follow the cursor until Moralis runs out of pages
+                cursor = data.get('cursor')
+                if not cursor:
+                    break
+                params['cursor'] = cursor
+            else:
+                logger.warning(
+                    "Token balances for wallet %s truncated after %d pages", address, MAX_TOKEN_PAGES,
+                    extra={'upstream': 'moralis', 'endpoint': 'tokens'},
+                )
+
+            cls.clear_negative_cache(address, [chain])
+            return True, tokens
+
+        except UpstreamTimeLimitError as e:
+            logger.warning(
+                "Token balances for wallet %s not fetched in time", address,
+                extra={'upstream': 'moralis', 'endpoint': 'tokens'},
+            )
+            return False, str(e)
+        except Exception as e:
+            error_msg = f"Error fetching wallet token balances: {str(e)}"
+            logger.exception(
+                "Error fetching token balances for %s", address, extra={'upstream': 'moralis', 'endpoint': 'tokens'}
+            )
+            return False, error_msg
+
+    @classmethod
+    def get_token_prices(cls, chain, token_addresses):
+        """
+        Fetch USD prices for up to TOKEN_PRICE_BATCH_SIZE ERC20 tokens in one call
+        Returns tuple: (success_bool, {token_address: usd_price}_or_error_message)
+        """
+        try:
+            moralis_chain = cls.CHAIN_MAPPING.get(chain.lower(), chain)
+            api_url = "https://deep-index.moralis.io/api/v2.2/erc20/prices"
+            headers = {
+                'accept': 'application/json',
+                'X-API-Key': settings.MORALIS_API_KEY
+            }
+            body = {'tokens': [{'token_address': a} for a in token_addresses]}
+            logger.info(
+                "Querying Moralis prices for %d tokens on %s", len(token_addresses), moralis_chain,
+                extra={'upstream': 'moralis', 'endpoint': 'erc20-prices'},
+            )
+
+            response = cls.get_session().post(
+                api_url,
+                headers=headers,
+                params={'chain': moralis_chain},
+                json=body,
+                timeout=settings.MORALIS_REQUEST_TIMEOUT,
+            )
+            if response.status_code != 200:
+                error_msg = f"Moralis API error: {response.status_code}, {response.text}"
+                logger.error(
+                    "Moralis price request for %d tokens on %s failed: %s",
+                    len(token_addresses), moralis_chain, response.status_code,
+                    extra={'upstream': 'moralis', 'endpoint': 'erc20-prices', 'status': response.status_code},
+                )
+                return False, error_msg
+
+            data = json.loads(response.content, parse_float=Decimal)
+            prices = {}
+            for item in data if isinstance(data, list) else []:
+                if isinstance(item, dict) and item.get('tokenAddress') and item.get('usdPrice') is not None:
+                    prices[item['tokenAddress'].lower()] = item['usdPrice']
+            return True, prices
+
+        except Exception as e:
+            error_msg = f"Error fetching token prices: {str(e)}"
+            logger.exception(
+                "Error fetching token prices on %s", chain, extra={'upstream': 'moralis', 'endpoint': 'erc20-prices'}
+            )
             return False, error_msg
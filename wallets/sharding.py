@@ -0,0 +1,124 @@
+# wallets/sharding.py
+import logging
+import os
+import socket
+import time
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import SYNC_PARTITIONS, SyncPartition, SyncWorker, Wallet
+from .scheduling import prioritize_wallets, stale_wallets
+from .services import refresh_wallet, refresh_portfolio_summaries
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_name():
+    """Worker name unique per process across nodes"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def heartbeat(name):
+    """
+    Record that worker name is alive and forget workers that stopped
+    heartbeating. Returns the sorted names of live workers.
+    """
+    now = timezone.now()
+    SyncWorker.objects.update_or_create(name=name, defaults={'heartbeat_at': now})
+    # A dead worker's leases lapse on their own; dropping it here shrinks everyone's fair share
+    SyncWorker.objects.filter(heartbeat_at__lt=now - settings.WALLET_SYNC_LEASE_TIMEOUT).delete()
+    return list(SyncWorker.objects.order_by('name').values_list('name', flat=True))
+
+
+def fair_share(name, live_workers):
+    """Number of partitions worker name should hold; shares across live_workers add up to SYNC_PARTITIONS"""
+    if name not in live_workers:
+        return 0
+    base, extra = divmod(SYNC_PARTITIONS, len(live_workers))
+    return base + (1 if live_workers.index(name) < extra else 0)
+
+
+def rebalance_partitions(name):
+    """
+    Renew worker name's leases and move it towards its fair share: release
+    partitions above the share, lease unowned or expired ones up to it.
+    Returns the partition numbers now held.
+    """
+    share = fair_share(name, heartbeat(name))
+    now = timezone.now()
+    claimable = Q(owner='') | Q(lease_expires_at__lt=now)
+
+    with transaction.atomic():
+        held = list(
+            SyncPartition.objects.filter(owner=name).order_by('number').values_list('number', flat=True)
+        )
+
+        if len(held) > share:
+            # Hand back the surplus so newly started workers can pick it up
+            surplus, held = held[share:], held[:share]
+            SyncPartition.objects.filter(owner=name, number__in=surplus).update(owner='', lease_expires_at=None)
+        elif len(held) < share:
+            # Rows another worker is leasing right now are skipped rather than waited on
+            candidates = list(
+                SyncPartition.objects.select_for_update(skip_locked=True)
+                .filter(claimable)
+                .order_by('number')
+                .values_list('number', flat=True)[:share - len(held)]
+            )
+            # Conditional update keeps the claim safe on databases without row locks
+            SyncPartition.objects.filter(claimable, number__in=candidates).update(owner=name)
+            held = list(
+                SyncPartition.objects.filter(owner=name).order_by('number').values_list('number', flat=True)
+            )
+
+        SyncPartition.objects.filter(owner=name).update(
+            lease_expires_at=now + settings.WALLET_SYNC_LEASE_TIMEOUT
+        )
+    return held
+
+
+def release_partitions(name):
+    """Give up all of worker name's leases so others take them over immediately"""
+    SyncPartition.objects.filter(owner=name).update(owner='', lease_expires_at=None)
+    SyncWorker.objects.filter(name=name).delete()
+
+
+def run_partition_worker(name, batch_size):
+    """
+    One round of background refresh for worker name: rebalance leases, then
+    refresh up to batch_size of the most valuable stale wallets in the held
+    partitions. Stops starting refreshes at half the lease timeout; each one is
+    bounded by WALLET_REFRESH_TIME_LIMIT, so the lease is renewed before it can
+    lapse mid-batch. Returns the number of wallets processed.
+    """
+    partitions = rebalance_partitions(name)
+    if not partitions:
+        return 0
+
+    deadline = time.monotonic() + settings.WALLET_SYNC_LEASE_TIMEOUT.total_seconds() / 2
+    wallets = stale_wallets(Wallet.objects.filter(sync_partition__in=partitions))
+    wallet_ids = prioritize_wallets(wallets, budget=batch_size)
+    wallets_by_id = Wallet.objects.in_bulk(wallet_ids)
+
+    processed = 0
+    refreshed_wallet_ids = []
+    for wallet_id in wallet_ids:
+        if time.monotonic() >= deadline:
+            break
+        wallet = wallets_by_id[wallet_id]
+        try:
+            success, _ = refresh_wallet(wallet)
+        except Exception:
+            logger.exception(
+                "Error refreshing wallet %s (%s)", wallet.address, wallet.chain,
+                extra={'wallet_id': wallet.id, 'worker': name},
+            )
+            success = False
+        processed += 1
+        if success:
+            refreshed_wallet_ids.append(wallet_id)
+
+    if refreshed_wallet_ids:
+        refresh_portfolio_summaries(wallet_ids=refreshed_wallet_ids)
+    return processed
@@ -0,0 +1,42 @@
+# wallets/signals.py
+import threading
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import WalletUser
+from .services import refresh_portfolio_summaries
+
+# Users whose summary needs recomputing once the current transaction commits
+_pending = threading.local()
+
+
+def schedule_summary_refresh(*user_ids):
+    """
+    Recompute the users' PortfolioSummary rows after commit. Changes within
+    one transaction (e.g. an admin bulk delete, or a wallet delete cascading
+    to its links) are batched into a single refresh.
+    """
+    pending = getattr(_pending, 'user_ids', None)
+    if pending is None:
+        pending = _pending.user_ids = set()
+    pending.update(user_ids)
+    transaction.on_commit(flush_summary_refreshes)
+
+
+def flush_summary_refreshes():
+    """Refresh every scheduled summary; later callbacks of the same transaction find nothing left"""
+    user_ids = getattr(_pending, 'user_ids', None)
+    _pending.user_ids = None
+    if user_ids:
+        refresh_portfolio_summaries(user_ids=user_ids)
+
+
+@receiver(post_save, sender=WalletUser, dispatch_uid='wallets.walletuser_saved')
+def walletuser_saved(sender, instance, **kwargs):
+    schedule_summary_refresh(instance.user_id)
+
+
+@receiver(post_delete, sender=WalletUser, dispatch_uid='wallets.walletuser_deleted')
+def walletuser_deleted(sender, instance, **kwargs):
+    # Also covers deleting a Wallet, which cascades to its links
+    schedule_summary_refresh(instance.user_id)
@@ -0,0 +1,153 @@
+# wallets/streams.py
+import hmac
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max, Min, Q
+from django.db.models.functions import Upper
+from django.utils import timezone
+from .models import Wallet, WalletEvent
+from .services import MoralisService, refresh_wallet, refresh_portfolio_summaries
+
+logger = logging.getLogger(__name__)
+
+# Moralis Streams identifies chains by hex chain id
+STREAM_CHAIN_IDS = {
+    '0x1': 'eth',
+    '0x38': 'bsc',
+    '0x89': 'polygon',
+    '0xa86a': 'avalanche',
+    '0xfa': 'fantom',
+    '0xa4b1': 'arbitrum',
+    '0xa': 'optimism',
+}
+
+# Payload sections and the keys in them that hold addresses whose balances may have moved
+ADDRESS_FIELDS = {
+    'txs': ('fromAddress', 'toAddress'),
+    'erc20Transfers': ('from', 'to'),
+    'nftTransfers': ('from', 'to'),
+    'nativeTransfers': ('from', 'to'),
+    'internalTxs': ('from', 'to'),
+}
+
+
+def verify_signature(body, signature, secret=None):
+    """
+    Check a Moralis Streams x-signature header: keccak256(raw body + secret).
+    An unset secret rejects everything.
+    """
+    secret = settings.MORALIS_STREAMS_SECRET if secret is None else secret
+    if not secret or not signature:
+        return False
+
+    # Only the webhook needs keccak, so keep pycryptodome off the startup path
+    from Crypto.Hash import keccak
+
+    digest = keccak.new(digest_bits=256, data=body + secret.encode()).hexdigest()
+    return hmac.compare_digest(f"0x{digest}", signature.lower())
+
+
+def extract_addresses(payload):
+    """Return the lowercased addresses touched by a stream payload"""
+    addresses = set()
+    for section, keys in ADDRESS_FIELDS.items():
+        for entry in payload.get(section) or []:
+            if not isinstance(entry, dict):
+                continue
+            for key in keys:
+                if isinstance(entry.get(key), str):
+                    addresses.add(entry[key].lower())
+    return addresses
+
+
+def ingest_stream_payload(payload):
+    """
+    Queue an event for every tracked wallet touched by a stream payload.
+    Returns the number of events queued.
+    """
+    if not isinstance(payload, dict):
+        return 0
+    chain = STREAM_CHAIN_IDS.get(str(payload.get('chainId', '')).lower())
+    addresses = extract_addresses(payload)
+    if not chain or not addresses:
+        # Moralis sends an empty test payload when a stream is created
+        return 0
+
+    # Stored addresses may be checksummed; match case-insensitively on the UPPER(address) index
+    wallet_ids = (
+        Wallet.objects.annotate(address_upper=Upper('address'))
+        .filter(chain=chain, address_upper__in=[a.upper() for a in addresses])
+        .values_list('id', flat=True)
+    )
+    events = WalletEvent.objects.bulk_create([WalletEvent(wallet_id=wallet_id) for wallet_id in wallet_ids])
+
+    # New activity can turn an address with "no data" into one with a balance
+    cache.delete_many([
+        MoralisService.negative_cache_key(address, c) for address in addresses for c in (chain, None)
+    ])
+    return len(events)
+
+
+def process_wallet_events(debounce=None, max_delay=None, batch_size=100):
+    """
+    Refresh wallets with pending events, once per wallet per batch.
+
+    A burst of events for one wallet is debounced: the wallet waits until it
+    has been quiet for `debounce`, but never longer than `max_delay` after its
+    first pending event. Wallets whose refresh fails keep their events
+    pending and are retried with exponential backoff. Returns the number of
+    wallets refreshed.
+    """
+    debounce = settings.WALLET_EVENT_DEBOUNCE if debounce is None else debounce
+    max_delay = settings.WALLET_EVENT_MAX_DELAY if max_delay is None else max_delay
+    started_at = timezone.now()
+
+    pending = WalletEvent.objects.filter(processed_at__isnull=True)
+    backing_off = pending.filter(retry_after__gt=started_at).values('wallet_id')
+    due = (
+        pending.exclude(wallet_id__in=backing_off)
+        .values('wallet_id')
+        .annotate(first=Min('received_at'), last=Max('received_at'))
+        .filter(Q(last__lte=started_at - debounce) | Q(first__lte=started_at - max_delay))
+        .order_by('first')
+        .values_list('wallet_id', flat=True)[:batch_size]
+    )
+    wallet_ids = list(due)
+
+    refreshed_wallet_ids = []
+    for wallet in Wallet.objects.filter(id__in=wallet_ids):
+        try:
+            success, _ = refresh_wallet(wallet)
+        except Exception:
+            logger.exception(
+                "Error refreshing wallet %s (%s) from events", wallet.address, wallet.chain,
+                extra={'wallet_id': wallet.id},
+            )
+            success = False
+        if success:
+            refreshed_wallet_ids.append(wallet.id)
+        else:
+            schedule_event_retry(wallet.id)
+
+    if refreshed_wallet_ids:
+        refresh_portfolio_summaries(wallet_ids=refreshed_wallet_ids)
+
+    # Events that arrived mid-refresh stay pending and trigger another pass
+    WalletEvent.objects.filter(
+        wallet_id__in=refreshed_wallet_ids,
+        processed_at__isnull=True,
+        received_at__lte=started_at,
+    ).update(processed_at=timezone.now())
+    return len(refreshed_wallet_ids)
+
+
+def schedule_event_retry(wallet_id):
+    """Hold back a wallet's pending events after a failed refresh, doubling the wait each attempt"""
+    pending = WalletEvent.objects.filter(wallet_id=wallet_id, processed_at__isnull=True)
+    attempts = (pending.aggregate(attempts=Max('attempts'))['attempts'] or 0) + 1
+    backoff = min(
+        settings.WALLET_EVENT_RETRY_BACKOFF * 2 ** (attempts - 1),
+        settings.WALLET_EVENT_MAX_BACKOFF,
+    )
+    pending.update(attempts=attempts, retry_after=timezone.now() + backoff)
@@ -1,3 +1,620 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from Crypto.Hash import keccak
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .jobs import prune_sync_jobs, run_sync_job, start_sync_job
+from .models import (
+    SYNC_PARTITIONS, PortfolioSummary, SyncJob, SyncJobItem, SyncPartition, SyncWorker, TokenPrice, Wallet,
+    WalletEvent, WalletHolding, WalletUser,
+)
+from . import services, sharding
+from .scheduling import prioritize_wallets
+from .services import (
+    InvalidBalanceError, MoralisService, UpstreamTimeLimitError, parse_token_amount, parse_token_price,
+    parse_usd_amount, revalue_holdings,
+)
+from .streams import process_wallet_events
 
-# Create your tests here.
+STREAMS_SECRET = 'test-streams-secret'
+
+
+def sign(body, secret=STREAMS_SECRET):
+    return '0x' + keccak.new(digest_bits=256, data=body + secret.encode()).hexdigest()
+
+
+def transfer_payload(chain_id, *addresses):
+    return {
+        'chainId': chain_id,
+        'erc20Transfers': [{'from': address, 'to': '0x' + '0' * 40} for address in addresses],
+    }
+
+
+@override_settings(MORALIS_STREAMS_SECRET=STREAMS_SECRET)
+class StreamWebhookTests(TestCase):
+    """Signature checks on the Moralis Streams webhook"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.wallet = Wallet.objects.create(address='0x' + 'a' * 40, chain='eth')
+
+    def post(self, body, signature):
+        return self.client.post(
+            '/api/wallets/webhooks/moralis/', body, content_type='application/json', HTTP_X_SIGNATURE=signature
+        )
+
+    def test_valid_signature_queues_events(self):
+        body = json.dumps(transfer_payload('0x1', self.wallet.address)).encode()
+        response = self.post(body, sign(body))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'queued': 1})
+        self.assertEqual(WalletEvent.objects.filter(wallet=self.wallet).count(), 1)
+
+    def test_invalid_signature_is_rejected(self):
+        body = json.dumps(transfer_payload('0x1', self.wallet.address)).encode()
+        for signature in (sign(body, 'other-secret'), sign(body + b' '), '', None):
+            with self.subTest(signature=signature):
+                response = self.post(body, signature) if signature is not None else self.client.post(
+                    '/api/wallets/webhooks/moralis/', body, content_type='application/json'
+                )
+                self.assertEqual(response.status_code, 401)
+        self.assertFalse(WalletEvent.objects.exists())
+
+    @override_settings(MORALIS_STREAMS_SECRET='')
+    def test_unset_secret_rejects_everything(self):
+        body = json.dumps(transfer_payload('0x1', self.wallet.address)).encode()
+        self.assertEqual(self.post(body, sign(body, '')).status_code, 401)
+
+
+class ReplayTestCase(TestCase):
+    """Drives ingestion through the replay_wallet_events command, as recorded payloads would"""
+
+    def replay(self, *payloads):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl') as f:
+            f.write('\n'.join(json.dumps(payload) for payload in payloads))
+            f.flush()
+            call_command('replay_wallet_events', f.name, stdout=mock.MagicMock())
+
+    def age_events(self, wallet, **delta):
+        WalletEvent.objects.filter(wallet=wallet).update(received_at=timezone.now() - timedelta(**delta))
+
+
+class StreamMatchingTests(ReplayTestCase):
+    """Which tracked wallets a payload queues events for"""
+
+    def test_matches_address_case_insensitively_on_the_payload_chain(self):
+        checksummed = Wallet.objects.create(address='0xAbCdEf' + '1' * 34, chain='eth')
+        same_address_other_chain = Wallet.objects.create(address=checksummed.address, chain='polygon')
+        Wallet.objects.create(address='0x' + '2' * 40, chain='eth')
+
+        self.replay(transfer_payload('0x1', checksummed.address.lower(), '0x' + '9' * 40))
+
+        self.assertEqual(list(WalletEvent.objects.values_list('wallet_id', flat=True)), [checksummed.id])
+        self.assertFalse(WalletEvent.objects.filter(wallet=same_address_other_chain).exists())
+
+    def test_unknown_chain_and_empty_payloads_are_ignored(self):
+        wallet = Wallet.objects.create(address='0x' + 'a' * 40, chain='eth')
+        self.replay(transfer_payload('0x999', wallet.address), {'chainId': '0x1'}, {})
+        self.assertFalse(WalletEvent.objects.exists())
+
+
+@mock.patch('wallets.streams.refresh_portfolio_summaries')
+@mock.patch('wallets.streams.refresh_wallet', return_value=(True, None))
+class ProcessWalletEventsTests(ReplayTestCase):
+    """Debounced refreshes driven by queued events"""
+
+    def setUp(self):
+        self.wallet = Wallet.objects.create(address='0x' + 'a' * 40, chain='eth')
+
+    def process(self):
+        return process_wallet_events(debounce=timedelta(seconds=30), max_delay=timedelta(minutes=5))
+
+    def test_recent_events_wait_for_the_debounce_window(self, refresh_wallet, _summaries):
+        self.replay(transfer_payload('0x1', self.wallet.address))
+        self.assertEqual(self.process(), 0)
+        refresh_wallet.assert_not_called()
+
+        self.age_events(self.wallet, seconds=31)
+        self.assertEqual(self.process(), 1)
+        refresh_wallet.assert_called_once()
+        self.assertFalse(WalletEvent.objects.filter(processed_at__isnull=True).exists())
+
+    def test_busy_wallet_is_refreshed_after_max_delay(self, refresh_wallet, _summaries):
+        self.replay(transfer_payload('0x1', self.wallet.address))
+        self.age_events(self.wallet, minutes=6)
+        # Fresh activity keeps the wallet from going quiet...
+        self.replay(transfer_payload('0x1', self.wallet.address))
+        # ...but the oldest event has waited past max_delay
+        self.assertEqual(self.process(), 1)
+        refresh_wallet.assert_called_once()
+
+    def test_events_arriving_mid_refresh_stay_pending(self, refresh_wallet, _summaries):
+        self.replay(transfer_payload('0x1', self.wallet.address))
+        self.age_events(self.wallet, minutes=1)
+
+        def refresh_with_new_activity(wallet):
+            self.replay(transfer_payload('0x1', wallet.address))
+            return True, None
+        refresh_wallet.side_effect = refresh_with_new_activity
+
+        self.assertEqual(self.process(), 1)
+        pending = WalletEvent.objects.filter(processed_at__isnull=True)
+        self.assertEqual(pending.count(), 1)
+        self.assertEqual(WalletEvent.objects.filter(processed_at__isnull=False).count(), 1)
+
+    def test_failed_refresh_keeps_events_pending_with_backoff(self, refresh_wallet, _summaries):
+        refresh_wallet.return_value = (False, 'Moralis API error: 503')
+        self.replay(transfer_payload('0x1', self.wallet.address))
+        self.age_events(self.wallet, minutes=1)
+
+        self.assertEqual(self.process(), 0)
+        event = WalletEvent.objects.get()
+        self.assertIsNone(event.processed_at)
+        self.assertEqual(event.attempts, 1)
+        self.assertGreater(event.retry_after, timezone.now())
+
+        # Backing off: not retried straight away
+        self.process()
+        self.assertEqual(refresh_wallet.call_count, 1)
+
+        # Retried once the backoff has passed, and cleared on success
+        WalletEvent.objects.update(retry_after=timezone.now() - timedelta(seconds=1))
+        refresh_wallet.return_value = (True, None)
+        self.assertEqual(self.process(), 1)
+        self.assertIsNotNone(WalletEvent.objects.get().processed_at)
+
+
+class PrioritizeWalletsTests(TestCase):
+    """Staleness-cost ordering of wallets to refresh"""
+
+    def test_link_count_covers_all_users_on_a_user_filtered_queryset(self):
+        users = [get_user_model().objects.create_user(email=f'user{i}@example.com', password='x') for i in range(5)]
+        shared = Wallet.objects.create(address='0x' + 'a' * 40, chain='eth', balance_usd=100)
+        single = Wallet.objects.create(address='0x' + 'b' * 40, chain='eth', balance_usd=300)
+        WalletUser.objects.bulk_create(
+            [WalletUser(user=user, wallet=shared) for user in users] + [WalletUser(user=users[0], wallet=single)]
+        )
+        Wallet.objects.update(synced_at=timezone.now() - timedelta(hours=1))
+
+        # Same ranking whether or not the queryset is already joined through walletuser
+        for wallets in (Wallet.objects.all(), Wallet.objects.filter(walletuser__user=users[0])):
+            with self.subTest(query=str(wallets.query)):
+                self.assertEqual(prioritize_wallets(wallets), [shared.id, single.id])
+
+
+class SyncJobReuseTests(TestCase):
+    """Repeated /sync/ calls on a fresh portfolio don't pile up jobs"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='sync@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for i in range(3):
+            self.link(Wallet.objects.create(address=f'0x{i:040x}', chain='eth', balance_usd=10))
+
+    def link(self, wallet):
+        WalletUser.objects.create(user=self.user, wallet=wallet)
+
+    def test_fresh_portfolio_reuses_the_latest_completed_job(self):
+        job_ids = {self.client.get('/api/wallets/sync/').json()['job']['id'] for _ in range(5)}
+        self.assertEqual(len(job_ids), 1)
+        self.assertEqual(SyncJob.objects.count(), 1)
+        self.assertEqual(SyncJobItem.objects.count(), 3)
+
+    def test_changed_wallet_set_starts_a_new_job(self):
+        first, _ = start_sync_job(self.user)
+        run_sync_job(first)
+        self.link(Wallet.objects.create(address='0x' + 'f' * 40, chain='eth', balance_usd=10))
+        second, created = start_sync_job(self.user)
+        self.assertTrue(created)
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual(second.items.count(), 4)
+
+    def test_prune_deletes_old_finished_jobs(self):
+        job, _ = start_sync_job(self.user)
+        run_sync_job(job)
+        self.assertEqual(job.status, SyncJob.Status.COMPLETED)
+        self.assertEqual(prune_sync_jobs(), 0)
+
+        SyncJob.objects.update(finished_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(prune_sync_jobs(), 1)
+        self.assertFalse(SyncJobItem.objects.exists())
+
+
+class ParseDecimalTests(TestCase):
+    """Range checks apply to the quantized value that will be stored"""
+
+    def test_rounding_up_to_the_limit_is_rejected(self):
+        cases = [
+            (parse_usd_amount, '9999999999999999.995'),
+            (parse_token_amount, '9' * 30 + '.9999999999999999995'),
+            (parse_token_price, '9' * 20 + '.9999999999999999995'),
+        ]
+        for parse, value in cases:
+            with self.subTest(parse=parse.__name__):
+                with self.assertRaises(InvalidBalanceError):
+                    parse(value)
+
+    def test_largest_storable_values_are_accepted(self):
+        self.assertEqual(str(parse_usd_amount('9999999999999999.994')), '9999999999999999.99')
+        self.assertEqual(parse_token_amount('9' * 30 + '.999999999999999999'), Decimal('9' * 30 + '.999999999999999999'))
+
+
+class UpstreamTimeLimitTests(TestCase):
+    """Moralis calls made for one refresh share a deadline instead of each getting the full timeout"""
+
+    def setUp(self):
+        self.clock = 0.0
+        self.timeouts = []
+
+        def fake_get(url, headers=None, params=None, timeout=None):
+            self.timeouts.append(timeout)
+            self.clock += 4
+            return mock.Mock(status_code=200, content=b'{"result": [], "cursor": "next"}')
+
+        session = mock.Mock(get=mock.Mock(side_effect=fake_get))
+        self.enterContext(mock.patch.object(MoralisService, 'get_session', return_value=session))
+        self.enterContext(mock.patch('wallets.services.time.monotonic', side_effect=lambda: self.clock))
+
+    @override_settings(MORALIS_REQUEST_TIMEOUT=(3.05, 10))
+    def test_timeouts_shrink_to_the_time_left(self):
+        self.assertEqual(MoralisService.request_timeout(), (3.05, 10))
+        self.assertEqual(MoralisService.request_timeout(deadline=5), (3.05, 5))
+        with self.assertRaises(UpstreamTimeLimitError):
+            MoralisService.request_timeout(deadline=0)
+
+    @override_settings(MORALIS_REQUEST_TIMEOUT=(3.05, 10))
+    def test_paging_stops_at_the_deadline(self):
+        success, error = MoralisService.get_wallet_token_balances('0x' + 'a' * 40, 'eth', deadline=10)
+
+        self.assertFalse(success)
+        self.assertIn('Time limit', error)
+        # Calls start at t=0, 4 and 8; the fourth page would start past the deadline
+        self.assertEqual(self.timeouts, [(3.05, 10), (3.05, 6), (2, 2)])
+
+
+class NegativeCacheTests(TestCase):
+    """Failed net-worth lookups are remembered, so retries don't go back to Moralis"""
+    address = '0x' + 'c' * 40
+
+    def setUp(self):
+        cache.clear()
+        self.session = mock.Mock()
+        self.enterContext(mock.patch.object(MoralisService, 'get_session', return_value=self.session))
+        self.cache_set = self.enterContext(mock.patch.object(services.cache, 'set', wraps=services.cache.set))
+        self.user = get_user_model().objects.create_user(email='negative@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def respond(self, status_code, data=None):
+        self.session.get.return_value = mock.Mock(
+            status_code=status_code, content=json.dumps(data or {}).encode(), text=json.dumps(data or {}),
+        )
+
+    def assert_cached_as(self, kind):
+        key = MoralisService.negative_cache_key(self.address, 'eth')
+        self.cache_set.assert_called_with(key, mock.ANY, services.NEGATIVE_CACHE_TTLS[kind])
+        self.assertIsNotNone(cache.get(key))
+
+    def test_rejected_address_is_cached_as_invalid_and_served_from_cache(self):
+        self.respond(404, {'message': 'Invalid address'})
+
+        first = self.client.post('/api/wallets/add/', {'address': self.address, 'chain': 'eth'}, format='json')
+        self.assert_cached_as('invalid')
+        second = self.client.post('/api/wallets/add/', {'address': self.address, 'chain': 'eth'}, format='json')
+
+        self.assertEqual(first.status_code, 400)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(self.session.get.call_count, 1)
+
+        stats = MoralisService.get_negative_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        out = io.StringIO()
+        call_command('moralis_cache_stats', '--reset', stdout=out)
+        self.assertIn('1 hits, 1 misses (50.0% hit rate)', out.getvalue())
+        self.assertEqual(MoralisService.get_negative_cache_stats()['misses'], 0)
+
+    def test_outages_are_cached_as_transient(self):
+        self.respond(503)
+        self.assertFalse(MoralisService.get_wallet_net_worth(self.address, 'eth')[0])
+        self.assert_cached_as('transient')
+
+        cache.clear()
+        self.session.get.side_effect = ConnectionError("connection reset")
+        self.assertFalse(MoralisService.get_wallet_net_worth(self.address, 'eth')[0])
+        self.assert_cached_as('transient')
+
+    def test_later_success_clears_the_entry(self):
+        self.respond(503)
+        MoralisService.get_wallet_net_worth(self.address, 'eth')
+
+        # A lookup across all chains that covers eth clears the eth failure
+        self.respond(200, {'total_networth_usd': '5', 'chains': [{'chain': 'eth', 'networth_usd': '5'}]})
+        self.assertTrue(MoralisService.get_wallet_net_worth(self.address)[0])
+        self.assertIsNone(cache.get(MoralisService.negative_cache_key(self.address, 'eth')))
+
+        self.assertTrue(MoralisService.get_wallet_net_worth(self.address, 'eth')[0])
+        self.assertEqual(self.session.get.call_count, 3)
+
+
+class RevalueHoldingsTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.user = get_user_model().objects.create_user(email='revalue@example.com', password='x')
+        self.wallet = Wallet.objects.create(address='0x' + '1' * 40, chain='eth', balance_usd=Decimal('0'))
+        self.other = Wallet.objects.create(address='0x' + '2' * 40, chain='eth', balance_usd=Decimal('0'))
+        self.polygon = Wallet.objects.create(address='0x' + '3' * 40, chain='polygon', balance_usd=Decimal('4'))
+        for wallet in (self.wallet, self.other, self.polygon):
+            WalletUser.objects.create(user=self.user, wallet=wallet)
+
+        def hold(wallet, token, amount, usd_value):
+            return WalletHolding.objects.create(
+                wallet=wallet, token_address=token, symbol=token.upper(), amount=Decimal(amount),
+                usd_value=Decimal(usd_value), price_ts=now - timedelta(hours=1),
+            )
+
+        self.a = hold(self.wallet, 'a', '2', '20')
+        self.b = hold(self.wallet, 'b', '3', '6')
+        self.unpriced = hold(self.other, 'c', '1', '7')
+        self.huge = hold(self.other, 'd', '1e20', '1')
+        self.elsewhere = hold(self.polygon, 'a', '2', '4')
+
+        self.priced_at = now
+        TokenPrice.objects.bulk_create([
+            TokenPrice(chain='eth', token_address='a', usd_price=Decimal('15'), updated_at=now),
+            TokenPrice(chain='eth', token_address='b', usd_price=Decimal('1'), updated_at=now),
+            TokenPrice(chain='eth', token_address='d', usd_price=Decimal('1e19'), updated_at=now),
+        ])
+
+    def test_holdings_are_revalued_from_cached_prices(self):
+        self.assertEqual(revalue_holdings('eth'), 3)
+
+        self.a.refresh_from_db()
+        self.b.refresh_from_db()
+        self.assertEqual((self.a.usd_value, self.b.usd_value), (Decimal('30.00'), Decimal('3.00')))
+        self.assertEqual(self.a.price_ts, self.priced_at)
+
+        # 15 x 2 + 1 x 3
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance_usd, Decimal('33.00'))
+
+    def test_unpriced_and_other_chain_holdings_are_left_alone(self):
+        revalue_holdings('eth')
+
+        self.unpriced.refresh_from_db()
+        self.elsewhere.refresh_from_db()
+        self.assertEqual(self.unpriced.usd_value, Decimal('7.00'))
+        self.assertEqual(self.elsewhere.usd_value, Decimal('4.00'))
+        self.polygon.refresh_from_db()
+        self.assertEqual(self.polygon.balance_usd, Decimal('4.00'))
+
+    def test_value_too_large_for_the_column_is_dropped(self):
+        revalue_holdings('eth')
+
+        self.huge.refresh_from_db()
+        self.assertIsNone(self.huge.usd_value)
+        self.assertIsNone(self.huge.price_ts)
+        # Only the holding that still has a value counts towards the balance
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.balance_usd, Decimal('7.00'))
+
+    def test_portfolio_summary_is_refreshed(self):
+        revalue_holdings('eth')
+
+        summary = PortfolioSummary.objects.get(user=self.user)
+        self.assertEqual(summary.total_usd, Decimal('44.00'))
+        self.assertEqual(summary.chain_totals, {'eth': '40.00', 'polygon': '4.00'})
+        self.assertEqual(summary.wallet_count, 3)
+
+
+class PartitionLeaseTests(TestCase):
+    """How sync workers share partitions; each worker is a name, rounds are explicit"""
+
+    def setUp(self):
+        SyncPartition.objects.bulk_create(
+            [SyncPartition(number=n) for n in range(SYNC_PARTITIONS)], ignore_conflicts=True
+        )
+
+    def held(self):
+        return {
+            name: set(SyncPartition.objects.filter(owner=name).values_list('number', flat=True))
+            for name in SyncWorker.objects.values_list('name', flat=True)
+        }
+
+    def settle(self, *names, rounds=3):
+        for _ in range(rounds):
+            for name in names:
+                sharding.rebalance_partitions(name)
+        return self.held()
+
+    def test_workers_split_all_partitions_without_overlap(self):
+        held = self.settle('a', 'b', 'c')
+        self.assertEqual(sorted(len(p) for p in held.values()), [21, 21, 22])
+        self.assertEqual(set().union(*held.values()), set(range(SYNC_PARTITIONS)))
+        self.assertEqual(sum(len(p) for p in held.values()), SYNC_PARTITIONS)
+
+    def test_surplus_is_handed_back_when_a_worker_joins(self):
+        self.assertEqual(len(sharding.rebalance_partitions('a')), SYNC_PARTITIONS)
+
+        # Everything is leased, so the newcomer waits for a to give some up
+        self.assertEqual(sharding.rebalance_partitions('b'), [])
+        self.assertEqual(len(sharding.rebalance_partitions('a')), SYNC_PARTITIONS // 2)
+        self.assertEqual(len(sharding.rebalance_partitions('b')), SYNC_PARTITIONS // 2)
+
+    def test_dead_workers_partitions_are_taken_over_after_the_lease_expires(self):
+        held = self.settle('a', 'b')
+        self.assertEqual(len(held['b']), SYNC_PARTITIONS // 2)
+
+        # b stops heartbeating; until its leases lapse a can't take its partitions
+        self.assertEqual(len(sharding.rebalance_partitions('a')), SYNC_PARTITIONS // 2)
+
+        expired = timezone.now() - timedelta(seconds=1)
+        SyncWorker.objects.filter(name='b').update(heartbeat_at=expired - timedelta(minutes=5))
+        SyncPartition.objects.filter(owner='b').update(lease_expires_at=expired)
+        self.assertEqual(len(sharding.rebalance_partitions('a')), SYNC_PARTITIONS)
+        self.assertFalse(SyncWorker.objects.filter(name='b').exists())
+
+
+class ParallelSyncWorkerTests(TransactionTestCase):
+    """
+    Workers running concurrently (threads with their own database connections
+    to the shared test database; refresh is mocked as upstream latency)
+    refresh every stale wallet exactly once, and their refreshes overlap
+    rather than queueing behind each other.
+    """
+    WALLETS = 120
+    WORKERS = 3
+    LATENCY = 0.02
+
+    def setUp(self):
+        SyncPartition.objects.bulk_create(
+            [SyncPartition(number=n) for n in range(SYNC_PARTITIONS)], ignore_conflicts=True
+        )
+        for i in range(self.WALLETS):
+            Wallet.objects.create(address=f'0x{i:040x}', chain='eth')
+
+    def run_workers(self, count):
+        refreshed = {f'w{i}': [] for i in range(count)}
+        in_flight = {'now': 0, 'max': 0}
+        lock = threading.Lock()
+
+        def fake_refresh(wallet):
+            with lock:
+                in_flight['now'] += 1
+                in_flight['max'] = max(in_flight['max'], in_flight['now'])
+            time.sleep(self.LATENCY)
+            with lock:
+                in_flight['now'] -= 1
+                refreshed[threading.current_thread().name].append(wallet.id)
+            Wallet.objects.filter(pk=wallet.pk).update(balance_usd=1, synced_at=timezone.now())
+            return True, None
+
+        def work(name):
+            try:
+                # Let every worker heartbeat before any leases are taken
+                sharding.heartbeat(name)
+                barrier.wait()
+                while Wallet.objects.filter(balance_usd__isnull=True).exists():
+                    if not sharding.run_partition_worker(name, batch_size=10):
+                        time.sleep(0.01)
+                sharding.release_partitions(name)
+            finally:
+                connection.close()
+
+        barrier = threading.Barrier(count)
+        threads = [threading.Thread(target=work, args=(name,), name=name) for name in refreshed]
+        with mock.patch.object(sharding, 'refresh_wallet', side_effect=fake_refresh), \
+                mock.patch.object(sharding, 'refresh_portfolio_summaries'):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return refreshed, in_flight['max']
+
+    def test_workers_split_the_work_without_double_work(self):
+        refreshed, max_in_flight = self.run_workers(self.WORKERS)
+
+        wallet_ids = [wallet_id for ids in refreshed.values() for wallet_id in ids]
+        self.assertEqual(len(wallet_ids), self.WALLETS)
+        self.assertEqual(len(set(wallet_ids)), self.WALLETS)
+        self.assertTrue(all(refreshed.values()), "every worker should get a share")
+        # Independent of machine load, unlike wall-clock speedup
+        self.assertGreater(max_in_flight, 1, "workers should refresh concurrently")
+
+
+class PortfolioSummarySignalTests(TestCase):
+    """Summaries follow WalletUser links changed anywhere through the ORM (admin, shell, cascades)"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='summary@example.com', password='x')
+        self.eth = Wallet.objects.create(address='0x' + 'a' * 40, chain='eth', balance_usd=Decimal('10.50'))
+        self.polygon = Wallet.objects.create(address='0x' + 'b' * 40, chain='polygon', balance_usd=Decimal('5'))
+
+    def summary(self):
+        return PortfolioSummary.objects.get(pk=self.user.pk)
+
+    def test_adding_and_removing_links_updates_the_summary(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            WalletUser.objects.create(user=self.user, wallet=self.eth)
+            WalletUser.objects.create(user=self.user, wallet=self.polygon)
+        self.assertEqual(self.summary().total_usd, Decimal('15.50'))
+        self.assertEqual(self.summary().wallet_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            WalletUser.objects.filter(user=self.user, wallet=self.polygon).delete()
+        self.assertEqual(self.summary().total_usd, Decimal('10.50'))
+        self.assertEqual(self.summary().chain_totals, {'eth': '10.50'})
+        self.assertEqual(len(callbacks), 1)
+
+    def test_deleting_a_wallet_updates_summaries_of_its_users(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            WalletUser.objects.create(user=self.user, wallet=self.eth)
+            WalletUser.objects.create(user=self.user, wallet=self.polygon)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.eth.delete()
+        self.assertEqual(self.summary().total_usd, Decimal('5.00'))
+        self.assertEqual(self.summary().wallet_count, 1)
+
+
+    def test_adding_a_wallet_refreshes_every_holder_once(self):
+        other = get_user_model().objects.create_user(email='other@example.com', password='x')
+        with self.captureOnCommitCallbacks(execute=True):
+            WalletUser.objects.create(user=other, wallet=self.eth)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        net_worth = {'chains': [{'chain': 'eth', 'networth_usd': '20'}]}
+        refresh = mock.Mock(wraps=services.refresh_portfolio_summaries)
+        with mock.patch.object(MoralisService, 'get_wallet_net_worth', return_value=(True, net_worth)), \
+                mock.patch.object(MoralisService, 'get_wallet_token_balances', return_value=(True, [])), \
+                mock.patch('wallets.signals.refresh_portfolio_summaries', refresh), \
+                mock.patch('wallets.views.refresh_portfolio_summaries', refresh), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/wallets/add/', {'address': self.eth.address, 'chain': 'eth'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        refresh.assert_called_once_with(user_ids={self.user.pk, other.pk})
+        self.assertEqual(self.summary().total_usd, Decimal('20.00'))
+        self.assertEqual(PortfolioSummary.objects.get(pk=other.pk).total_usd, Decimal('20.00'))
+
+class WalletListOrderingTests(TestCase):
+    """?ordering= applies with and without pagination"""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(email='list@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        for i, balance in enumerate(['5', None, '20', '1']):
+            wallet = Wallet.objects.create(address=f'0x{i:040x}', chain='eth', balance_usd=balance)
+            WalletUser.objects.create(user=user, wallet=wallet)
+
+    def balances(self, response):
+        rows = response.json()
+        rows = rows['results'] if isinstance(rows, dict) else rows
+        return [row['balance_usd'] for row in rows]
+
+    def test_unpaginated_list_honors_ordering(self):
+        self.assertEqual(self.balances(self.client.get('/api/wallets/add/')), ['5.00', None, '20.00', '1.00'])
+        self.assertEqual(
+            self.balances(self.client.get('/api/wallets/add/?ordering=-balance_usd')),
+            [None, '20.00', '5.00', '1.00'],
+        )
+        self.assertEqual(
+            self.balances(self.client.get('/api/wallets/add/?ordering=-balance_usd')),
+            self.balances(self.client.get('/api/wallets/add/?ordering=-balance_usd&page_size=10')),
+        )
+
+    def test_unknown_ordering_is_rejected(self):
+        self.assertEqual(self.client.get('/api/wallets/add/?ordering=address').status_code, 400)
@@ -1,16 +1,27 @@
 # wallets/urls.py
 from os import name
 from django.urls import path
-from .views import WalletView, get_supported_chains
+from .jobs import count_sync_cost
+from .views import (
+    WalletView, HoldingsView, SyncJobView, MoralisStreamWebhookView, PortfolioSummaryView, get_supported_chains,
+)
 
 class WalletSyncView(WalletView):
     """API endpoint specifically for wallet synchronization"""
+    def get_throttle_cost(self, request):
+        """A sync costs one fetch per stale wallet it would refresh"""
+        return count_sync_cost(request.user)
+    
     def get(self, request):
         """Override get method to call sync"""
         return self.sync(request)
 
 class WalletDeleteView(WalletView):
     """API endpoint specifically for wallet deletion"""
+    def get_throttle_cost(self, request):
+        """Deleting never calls Moralis"""
+        return 0
+    
     def post(self, request):
         """Override post method to call delete"""
         return self.delete(request)
@@ -22,6 +33,18 @@ urlpatterns = [
     # Endpoint for synchronizing wallets (GET)
     path('sync/', WalletSyncView.as_view(), name='sync-wallets'),
     
+    # Endpoint for polling a sync job's progress (GET)
+    path('sync/<int:job_id>/', SyncJobView.as_view(), name='sync-job'),
+    
+    # Endpoint for the user's portfolio totals (GET)
+    path('summary/', PortfolioSummaryView.as_view(), name='portfolio-summary'),
+    
+    # Endpoint for top token holdings across the user's wallets (GET)
+    path('holdings/', HoldingsView.as_view(), name='wallet-holdings'),
+    
+    # Endpoint for Moralis Streams activity webhooks (POST)
+    path('webhooks/moralis/', MoralisStreamWebhookView.as_view(), name='moralis-webhook'),
+    
     # Endpoint for supported chains (GET)
     path('supported_chains/', get_supported_chains, name='supported-chains'),
 
@@ -3,10 +3,22 @@ from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from .serializers import AddWalletSerializer, WalletSerializer
-from .services import MoralisService
-from .models import Wallet, WalletUser
+from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.conf import settings
+from django.db import transaction
+from .serializers import (
+    AddWalletSerializer, WalletSerializer, WalletHoldingSerializer, SyncJobSerializer, PortfolioSummarySerializer,
+)
+from .services import (
+    MoralisService, InvalidBalanceError, extract_chain_balance, sync_wallet_holdings, refresh_portfolio_summaries,
+    refresh_deadline,
+)
+from .signals import schedule_summary_refresh
+from .models import Wallet, WalletUser, WalletHolding, SyncJob, SyncJobItem, PortfolioSummary
+from backend.throttling import MoralisBudgetThrottle
+from .jobs import start_sync_job, run_sync_job
+from .pagination import WalletKeysetPagination
+from .streams import verify_signature, ingest_stream_payload
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,6 +26,11 @@ logger = logging.getLogger(__name__)
 class WalletView(APIView):
     """API endpoint for wallet operations"""
     permission_classes = [IsAuthenticated]
+    throttle_classes = [MoralisBudgetThrottle]
+    
+    def get_throttle_cost(self, request):
+        """Number of wallet fetches from Moralis this request will make"""
+        return 1 if request.method == 'POST' else 0
     
     def post(self, request):
         """Add a new wallet for the authenticated user"""
@@ -33,7 +50,6 @@ class WalletView(APIView):
         # Define field names as variables to avoid string literal type errors
         address_field = 'address'
         chain_field = 'chain'
-        chains_field = 'chains'
         balance_field = 'balance_usd'
         
         # First check if validated_data exists and is a dictionary
@@ -54,8 +70,9 @@ class WalletView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Step 3: Fetch wallet data from Moralis
-        success, result = MoralisService.get_wallet_net_worth(address, chain)
+        # Step 3: Fetch wallet data from Moralis, within the same time limit as a background refresh
+        deadline = refresh_deadline()
+        success, result = MoralisService.get_wallet_net_worth(address, chain, deadline=deadline)
         
         if not success or not result or not isinstance(result, dict):
             return Response(
@@ -65,44 +82,50 @@ class WalletView(APIView):
         
         # Step 4: Process the wallet data
         try:
-            # Safely extract chains, handling possible None or non-dict result
-            chains = result.get(chains_field, [])
-            if not isinstance(chains, list):
-                chains = []  # Ensure chains is a list even if API returns unexpected type
-            
-            # Find the chain data using a loop instead of comprehension
-            chain_data = None
-            for c in chains:
-                if isinstance(c, dict) and c.get(chain_field) == chain:
-                    chain_data = c
-                    break
+            # Parse and quantize the balance before it gets anywhere near the ORM
+            try:
+                balance_value = extract_chain_balance(result, chain)
+            except InvalidBalanceError as e:
+                logger.warning(
+                    "Rejected balance for wallet %s (%s): %s", address, chain, e,
+                    extra={'user_id': request.user.id, 'upstream': 'moralis', 'endpoint': 'net-worth'},
+                )
+                return Response(
+                    {'error': f"Invalid balance data for chain: {chain}"},
+                    status=status.HTTP_502_BAD_GATEWAY
+                )
             
-            if not chain_data:
+            if balance_value is None:
                 return Response(
                     {'error': f"No data found for chain: {chain}"},
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Safely extract balance with fallbacks
-            balance_value = chain_data.get(balance_field, 0)
-            if not balance_value and 'networth_usd' in chain_data:
-                balance_value = chain_data.get('networth_usd', 0)
-            
             # Create separate defaults dictionary to avoid type errors
             defaults_dict = {balance_field: balance_value}
             
-            # Create or update the wallet
-            wallet, created = Wallet.objects.update_or_create(
-                address=address,
-                chain=chain,
-                defaults=defaults_dict
-            )
+            with transaction.atomic():
+                # Create or update the wallet
+                wallet, created = Wallet.objects.update_or_create(
+                    address=address,
+                    chain=chain,
+                    defaults=defaults_dict
+                )
+                
+                # Link the wallet to the user
+                WalletUser.objects.get_or_create(
+                    user=request.user,
+                    wallet=wallet
+                )
+                
+                # The balance may have changed for everyone holding this wallet, not just this user.
+                # Batched with the new link's own refresh into a single pass on commit
+                schedule_summary_refresh(
+                    *WalletUser.objects.filter(wallet=wallet).values_list('user_id', flat=True)
+                )
             
-            # Link the wallet to the user
-            WalletUser.objects.get_or_create(
-                user=request.user,
-                wallet=wallet
-            )
+            # Store the token breakdown; a failure here keeps the balance we already saved
+            sync_wallet_holdings(wallet, deadline=deadline)
             
             # Return the wallet data
             return Response(
@@ -111,82 +134,68 @@ class WalletView(APIView):
             )
             
         except Exception as e:
-            logger.exception(f"Error processing wallet: {str(e)}")
+            logger.exception(
+                "Error processing wallet %s (%s)", address, chain, extra={'user_id': request.user.id}
+            )
             return Response(
                 {'error': f"Failed to process wallet: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
     def get(self, request):
-        """Get all wallets for the authenticated user"""
-        # Get all wallet IDs for this user
-        wallet_ids = WalletUser.objects.filter(user=request.user).values_list('wallet_id', flat=True)
+        """
+        Get the authenticated user's wallets.
+        Optional query params: chain, fields (comma separated), ordering.
+        Passing cursor or page_size switches to keyset pagination.
+        """
+        wallets = Wallet.objects.filter(walletuser__user=request.user)
         
-        # Get the wallet objects
-        wallets = Wallet.objects.filter(id__in=wallet_ids)
+        chain = request.query_params.get('chain')
+        if chain:
+            wallets = wallets.filter(chain=chain)
         
-        # Serialize and return
-        serializer = WalletSerializer(wallets, many=True)
-        return Response(serializer.data)
+        # Sparse field selection; only load the columns we'll serialize
+        fields = None
+        if request.query_params.get('fields'):
+            fields = [f.strip() for f in request.query_params['fields'].split(',') if f.strip()]
+            unknown = set(fields) - set(WalletSerializer.Meta.fields)
+            if unknown:
+                return Response(
+                    {'error': f"Unknown fields: {', '.join(sorted(unknown))}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            wallets = wallets.only('id', 'balance_usd', *fields)
+        
+        paginator = WalletKeysetPagination()
+        if not {paginator.cursor_query_param, paginator.page_size_query_param} & set(request.query_params):
+            # Unpaginated list, kept for existing clients (ordered by id unless asked otherwise)
+            wallets = paginator.order_queryset(wallets, request)
+            serializer = WalletSerializer(wallets, many=True, fields=fields)
+            return Response(serializer.data)
+        
+        page = paginator.paginate_queryset(wallets, request, view=self)
+        serializer = WalletSerializer(page, many=True, fields=fields)
+        return paginator.get_paginated_response(serializer.data)
 
     def sync(self, request):
-        """Synchronize all wallets for the authenticated user"""
+        """Start (or resume) the user's sync job and advance it within the request budget"""
+        job = None
         try:
-            # Get all wallets for this user
-            wallet_ids = WalletUser.objects.filter(user=request.user).values_list('wallet_id', flat=True)
-            wallets = Wallet.objects.filter(id__in=wallet_ids)
+            # Repeated requests attach to the job that's already running
+            job, created = start_sync_job(request.user)
+            run_sync_job(job, budget=settings.WALLET_SYNC_REQUEST_BUDGET)
             
-            # Track successfully synced wallets
-            synced_wallets = []
-            
-            # Process each wallet
-            for wallet in wallets:
-                # Call Moralis to get updated data
-                success, result = MoralisService.get_wallet_net_worth(wallet.address, wallet.chain)
-                
-                if not success or not isinstance(result, dict):
-                    logger.warning(f"Failed to sync wallet {wallet.address} ({wallet.chain}): {result}")
-                    continue
-                    
-                # Process the result similar to your post method
-                try:
-                    chains = result.get('chains', [])
-                    
-                    # Find the relevant chain data
-                    chain_data = next((c for c in chains if isinstance(c, dict) and c.get('chain') == wallet.chain), None)
-                    
-                    if not chain_data:
-                        logger.warning(f"No data found for wallet {wallet.address} on chain {wallet.chain}")
-                        continue
-                    
-                    # Update the wallet balance
-                    balance_value = chain_data.get('balance_usd', 0)
-                    if not balance_value and 'networth_usd' in chain_data:
-                        balance_value = chain_data.get('networth_usd', 0)
-                    
-                    # Update the wallet
-                    wallet.balance_usd = balance_value
-                    wallet.save()
-                    
-                    # Add to synced wallets list
-                    synced_wallets.append({
-                        'address': wallet.address,
-                        'chain': wallet.chain,
-                        'balance_usd': wallet.balance_usd
-                    })
-                    
-                except Exception as e:
-                    logger.exception(f"Error processing wallet update: {str(e)}")
-                    continue
-            
-            # Return the updated wallets
-            return Response({
-                'wallets': synced_wallets,
-                'count': len(synced_wallets)
-            })
+            # 202 tells the client to poll the job (or call sync again) for the rest
+            return Response(
+                sync_job_data(job),
+                status=status.HTTP_200_OK if job.status == SyncJob.Status.COMPLETED else status.HTTP_202_ACCEPTED
+            )
             
         except Exception as e:
-            logger.exception(f"Error during wallet synchronization: {str(e)}")
+            logger.exception(
+                "Error during wallet synchronization",
+                extra={'user_id': request.user.id, 'sync_job_id': job.pk if job else None},
+            )
             return Response(
                 {'error': f"Failed to synchronize wallets: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -227,12 +236,99 @@ class WalletView(APIView):
             )
                 
         except Exception as e:
-            logger.exception(f"Error removing wallet: {str(e)}")
+            logger.exception("Error removing wallet", extra={'user_id': request.user.id})
             return Response(
                 {'error': f"Failed to remove wallet: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+def sync_job_data(job):
+    """Build the response body for a sync job: its progress plus the wallets synced so far"""
+    synced = Wallet.objects.filter(
+        syncjobitem__job=job,
+        syncjobitem__status=SyncJobItem.Status.DONE
+    )
+    wallets = WalletSerializer(synced, many=True).data
+    return {
+        'job': SyncJobSerializer(job).data,
+        'wallets': wallets,
+        'count': len(wallets)
+    }
+
+class SyncJobView(APIView):
+    """API endpoint for polling the progress of a sync job"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, job_id):
+        """Return progress for one of the user's sync jobs"""
+        job = SyncJob.objects.filter(pk=job_id, user=request.user).first()
+        if not job:
+            return Response(
+                {'error': f"Sync job {job_id} not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(sync_job_data(job))
+
+class PortfolioSummaryView(APIView):
+    """API endpoint for the user's headline portfolio numbers"""
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """Return the precomputed portfolio summary (a single primary-key lookup)"""
+        summary = PortfolioSummary.objects.filter(pk=request.user.pk).first()
+        if summary is None:
+            # First visit before anything populated the row
+            refresh_portfolio_summaries(user_ids=[request.user.pk])
+            summary = PortfolioSummary.objects.get(pk=request.user.pk)
+        return Response(PortfolioSummarySerializer(summary).data)
+
+class HoldingsView(APIView):
+    """API endpoint for token-level holdings across the user's portfolio"""
+    permission_classes = [IsAuthenticated]
+    
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 100
+    
+    def get(self, request):
+        """Return the user's largest holdings by USD value"""
+        try:
+            limit = int(request.query_params.get('limit', self.DEFAULT_LIMIT))
+        except ValueError:
+            return Response(
+                {'error': 'limit must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = max(1, min(limit, self.MAX_LIMIT))
+        
+        wallet_ids = WalletUser.objects.filter(user=request.user).values_list('wallet_id', flat=True)
+        holdings = (
+            WalletHolding.objects
+            .filter(wallet_id__in=wallet_ids, usd_value__isnull=False)
+            .select_related('wallet')
+            .order_by('-usd_value')[:limit]
+        )
+        
+        serializer = WalletHoldingSerializer(holdings, many=True)
+        return Response(serializer.data)
+
+class MoralisStreamWebhookView(APIView):
+    """Inbound endpoint for Moralis Streams address-activity payloads"""
+    # Moralis authenticates with the payload signature, not a user token
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    
+    def post(self, request):
+        """Verify the signature and queue refreshes for the wallets the payload touches"""
+        # Verify against the raw bytes before parsing anything
+        if not verify_signature(request.body, request.headers.get('x-signature')):
+            return Response(
+                {'error': 'Invalid signature'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        
+        queued = ingest_stream_payload(request.data)
+        return Response({'queued': queued})
+
 @api_view(['GET'])
 def get_supported_chains(_request):
     """Return a list of supported blockchain networks"""